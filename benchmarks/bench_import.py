@@ -0,0 +1,56 @@
+# Time to `import block_io` in a fresh interpreter, and which slow dependencies it loaded.
+#
+# usage: python benchmarks/bench_import.py [--repeat 10] [--max-ms 100]
+#
+# exits with status 1 if the best time is over --max-ms, or if a lazily imported dependency was loaded
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# imported on first use, never by `import block_io`
+LAZY_MODULES = ['bitcoinutils', 'sympy', 'Crypto', 'requests', 'ecdsa', 'asyncio', 'aiohttp', 'coincurve', 'orjson', 'pkg_resources']
+
+PROGRAM = '''
+import json, sys, time
+started = time.perf_counter()
+import block_io
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+''' % (LAZY_MODULES,)
+
+def import_once():
+    output = subprocess.check_output([sys.executable, '-c', PROGRAM], cwd = ROOT)
+    return json.loads(output.decode('utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type = int, default = 10)
+    parser.add_argument('--max-ms', type = float, default = None, help = 'fail if the best import time is over this')
+    args = parser.parse_args()
+
+    runs = [import_once() for i in range(args.repeat)]
+    times = sorted([run["seconds"] * 1000 for run in runs])
+    loaded = sorted(set([name for run in runs for name in run["loaded"]]))
+
+    print("import block_io: best %.1f ms, median %.1f ms" % (times[0], times[len(times) // 2]))
+
+    failed = False
+
+    if len(loaded) > 0:
+        print("loaded at import time, should be lazy: %s" % ", ".join(loaded))
+        failed = True
+
+    if args.max_ms is not None and times[0] > args.max_ms:
+        print("slower than %.1f ms" % args.max_ms)
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Compares the native and pure-Python PBKDF2 backends
+# at the iteration counts BlockIo.Helper.dynamicExtractKey sees in user_key algorithms.
+#
+# usage: python benchmarks/bench_pbkdf2.py [--iterations 2048,500000] [--repeat 3]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from block_io import pbkdf2
+
+def time_pin_to_aes_key(backend, pin, salt, iterations, repeat):
+    # mirrors BlockIo.Helper.pinToAesKey: two phases, half the iterations each
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        key = backend(pin, 16, salt, int(iterations/2))
+        backend(key.hex(), 32, salt, int(iterations/2))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', default = '2048,500000', help = 'comma-separated pbkdf2_iterations values')
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    backends = [('native', pbkdf2.pbkdf2_native), ('python', pbkdf2.pbkdf2_python)]
+
+    print("%12s %12s %12s %10s" % ("iterations", "native (s)", "python (s)", "speedup"))
+
+    for iterations in [int(i) for i in args.iterations.split(',')]:
+        results = [time_pin_to_aes_key(backend, "deadbeef", "922445847c173e90667a19d90729e1fb", iterations, args.repeat) for (name, backend) in backends]
+        print("%12d %12.4f %12.4f %9.1fx" % (iterations, results[0], results[1], results[1] / results[0]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Signatures per second for each low R signing backend in block_io.signing.
+#
+# usage: python benchmarks/bench_signing.py [--count 500]
+
+import argparse
+import os
+import sys
+import time
+from hashlib import sha256
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from block_io import BlockIo
+from block_io import signing
+
+def available_backends():
+    backends = [signing.EcdsaBackend()]
+
+    try:
+        backends.append(signing.Secp256k1Backend())
+    except ImportError:
+        print("secp256k1 backend unavailable (pip3 install coincurve)")
+
+    return backends
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type = int, default = 500)
+    args = parser.parse_args()
+
+    private_key = BlockIo.Key.from_privkey_hex("6b0e34587dece0ef042c4c7205ce6b3d4a64d0bc484735b9325f7971a0ead963").private_key
+    digests = [sha256(str(i).encode('utf-8')).digest() for i in range(args.count)]
+
+    print("%12s %14s" % ("backend", "signatures/s"))
+
+    for backend in available_backends():
+        start = time.perf_counter()
+
+        for digest in digests:
+            backend.sign(private_key, digest)
+
+        elapsed = time.perf_counter() - start
+        print("%12s %14.1f" % (backend.name, args.count / elapsed))
+
+if __name__ == "__main__":
+    main()
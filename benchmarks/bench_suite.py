@@ -0,0 +1,270 @@
+# Times the library's hot paths against the fixtures in tests/data/json, and API call overhead
+# against a local mock server. Results are written as JSON, and can be compared with an earlier run.
+#
+# usage: python benchmarks/bench_suite.py [--repeat 5] [--filter sign_] [--output results.json]
+#                                         [--compare baseline.json] [--threshold 0.10]
+#
+# --compare exits with status 1 if any benchmark got slower than the baseline by more than threshold
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from block_io import BlockIo
+from block_io.cache import KeyCache
+from block_io.decoder import get_json_decoder
+from block_io.signing import get_signing_backend
+from block_io import bitcoinutils_patches
+from block_io import script_cache
+from block_io.prepared import PreparedTransaction
+from block_io.serialize import multisig_script_sig, multisig_witness
+
+FIXTURES = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'json'))
+
+PIN = "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad"
+DTRUST_KEYS = [
+    "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+    "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+    "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61",
+    "6c1cefdfd9187b36b36c3698c1362642083dcc1941dc76d751481d3aa29ca65"
+]
+WIF = "cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML"
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as json_file:
+        return json.load(json_file)
+
+class Benchmark(object):
+    # fn() is one operation; it is run number times per repeat, and the best repeat is reported
+
+    def __init__(self, name, fn, number = 1, check = None):
+        self.name = name
+        self.fn = fn
+        self.number = number
+        self.check = check # called with fn()'s result once, before timing
+
+    def run(self, repeat):
+        result = self.fn() # warms caches, and catches a broken benchmark before we time it
+
+        if self.check is not None:
+            self.check(result)
+
+        times = []
+
+        for i in range(repeat):
+            start = time.perf_counter()
+
+            for j in range(self.number):
+                self.fn()
+
+            times.append((time.perf_counter() - start) / self.number)
+
+        times.sort()
+
+        return {"best": times[0], "median": times[len(times) // 2], "number": self.number, "repeat": repeat}
+
+def signing_benchmarks():
+    # create_and_sign_transaction for each fixture with a known response
+    # decrypted user keys are cached, key derivation is timed on its own below
+    blockio = BlockIo("", PIN, 2, key_cache = KeyCache())
+    benchmarks = []
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "prepare_*transaction_response*.json"))):
+        name = os.path.basename(path)
+        expected_name = name.replace("prepare_dtrust_transaction_response_", "create_and_sign_transaction_response_dtrust_") \
+                            .replace("prepare_transaction_response", "create_and_sign_transaction_response")
+
+        if "dtrust" in name:
+            required = re.search(r"([34])_?of_?5", expected_name)
+
+            if required is None or not os.path.exists(os.path.join(FIXTURES, expected_name)):
+                continue
+
+            keys = DTRUST_KEYS[0:int(required.group(1))]
+        elif "sweep" in name or not os.path.exists(os.path.join(FIXTURES, expected_name)):
+            continue
+        else:
+            keys = []
+
+        prepare_data = load_fixture(name)
+        expected = load_fixture(expected_name)
+
+        def check(response, expected = expected, name = name):
+            if response != expected:
+                raise AssertionError("create_and_sign_transaction no longer matches the fixture for %s" % name)
+
+        benchmarks.append(Benchmark("sign_" + name[len("prepare_"):-len(".json")],
+                                    lambda prepare_data = prepare_data, keys = keys: blockio.create_and_sign_transaction(prepare_data, keys),
+                                    check = check))
+
+    return benchmarks
+
+def assembly_benchmarks():
+    # the fully-signed scriptSigs and witnesses of the 4 of 5 dTrust fixtures, from Script objects with hex
+    # elements (as create_and_sign_transaction used to) and from bytes (as it does now)
+    # the signatures are stand-ins of the usual length, the scripts are serialized as they would be in the transaction
+    signature = bytes(range(70)) + b'\x01'
+    benchmarks = []
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "prepare_dtrust_transaction_response_*4of5*.json"))):
+        name = os.path.basename(path)[len("prepare_dtrust_transaction_response_"):-len(".json")]
+        inputs = PreparedTransaction.load(load_fixture(os.path.basename(path))).inputs
+
+        def from_scripts(inputs = inputs):
+            for cur_input in inputs:
+                address_data = cur_input.address_data
+                redeem_script = script_cache.redeem_script(address_data.required_signatures, address_data.public_keys)
+                signatures = [bitcoinutils_patches.signature_with_sighash(signature[:-1].hex())] * address_data.required_signatures
+                script = bitcoinutils_patches.Script(["OP_0"] + signatures + [redeem_script.to_hex()])
+
+                if address_data.address_type == "P2SH":
+                    script.to_bytes()
+                else:
+                    script.to_bytes(True)
+
+                if address_data.address_type == "P2WSH-over-P2SH":
+                    bitcoinutils_patches.Script([script_cache.p2wsh_program(address_data.required_signatures, address_data.public_keys)]).to_bytes()
+
+        def from_bytes(inputs = inputs):
+            for cur_input in inputs:
+                address_data = cur_input.address_data
+                redeem_script = script_cache.redeem_script_bytes(address_data.required_signatures, address_data.public_keys)
+                signatures = [signature] * address_data.required_signatures
+
+                if address_data.address_type == "P2SH":
+                    multisig_script_sig(signatures, redeem_script).to_bytes()
+                else:
+                    multisig_witness(signatures, redeem_script).to_bytes(True)
+
+                if address_data.address_type == "P2WSH-over-P2SH":
+                    script_cache.p2wsh_script_sig(address_data.required_signatures, address_data.public_keys).to_bytes()
+
+        benchmarks.append(Benchmark("assemble_scripts_dtrust_" + name, from_scripts, number = 10))
+        benchmarks.append(Benchmark("assemble_bytes_dtrust_" + name, from_bytes, number = 10))
+
+    return benchmarks
+
+def key_benchmarks():
+    user_key = load_fixture("prepare_transaction_response.json")['data']['user_key']
+    outputs = load_fixture("prepare_transaction_response_witness_v1_output.json")['data']
+    addresses = [output['receiving_address'] for output in outputs['outputs']]
+    network = outputs['network']
+
+    def output_scripts():
+        for address in addresses:
+            bitcoinutils_patches.get_output_script(address, network)
+
+    return [Benchmark("pin_to_aes_key", lambda: BlockIo.Helper.pinToAesKey(PIN), number = 10),
+            Benchmark("dynamic_extract_key", lambda: BlockIo.Helper.dynamicExtractKey(user_key, PIN), number = 10),
+            Benchmark("get_output_script", output_scripts, number = 1000 // max(1, len(addresses))),
+            Benchmark("key_from_wif", lambda: BlockIo.Key.from_wif(WIF), number = 1000)]
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is Python 3.7+
+    daemon_threads = True
+
+class MockHandler(BaseHTTPRequestHandler):
+    # answers every call with the get_balance fixture, keeping connections alive
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True # or delayed ACKs add ~40ms to every call
+    body = None
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def api_benchmarks(server):
+    blockio = BlockIo("benchmark", None, 2)
+    blockio.base_url = 'http://%s:%d/api/v2/API_CALL/?api_key=benchmark' % server.server_address
+
+    return [Benchmark("api_call_get_balance", lambda: blockio.get_balance(), number = 200)]
+
+def compare(results, baseline, threshold):
+    # prints each benchmark next to the baseline, returns the names that regressed
+    regressions = []
+
+    print("\n%-70s %12s %12s %8s" % ("benchmark", "baseline (s)", "now (s)", "change"))
+
+    for (name, result) in sorted(results.items()):
+        if name not in baseline:
+            continue
+
+        change = result["best"] / baseline[name]["best"] - 1
+        flag = ""
+
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print("%-70s %12.6f %12.6f %+7.1f%%%s" % (name, baseline[name]["best"], result["best"], change * 100, flag))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--filter', default = None, help = 'only run benchmarks whose name contains this')
+    parser.add_argument('--output', default = None, help = 'write results to this JSON file')
+    parser.add_argument('--compare', default = None, help = 'JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type = float, default = 0.10, help = 'slowdown that counts as a regression, 0.10 is 10%%')
+    args = parser.parse_args()
+
+    MockHandler.body = json.dumps(load_fixture("get_balance_response.json")).encode('utf-8')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    try:
+        benchmarks = signing_benchmarks() + assembly_benchmarks() + key_benchmarks() + api_benchmarks(server)
+        results = dict()
+
+        print("%-70s %12s %12s" % ("benchmark", "best (s)", "median (s)"))
+
+        for benchmark in benchmarks:
+            if args.filter is not None and args.filter not in benchmark.name:
+                continue
+
+            results[benchmark.name] = benchmark.run(args.repeat)
+            print("%-70s %12.6f %12.6f" % (benchmark.name, results[benchmark.name]["best"], results[benchmark.name]["median"]))
+    finally:
+        server.shutdown()
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "signing_backend": get_signing_backend().name,
+              "json_decoder": "%s.%s" % (get_json_decoder().__module__, get_json_decoder().__name__),
+              "results": results}
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent = 2, sort_keys = True)
+
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(results, baseline["results"], args.threshold)
+
+        if len(regressions) > 0:
+            print("\n%d benchmark(s) regressed by more than %.0f%%" % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,52 @@
-from Crypto.Cipher import AES
 import base64
 import base58
 from binascii import hexlify, unhexlify
+import functools
+import itertools
 import json
-import requests
-import pkg_resources
+import sys
 
 from hashlib import sha256
 from . import pbkdf2
-
-from .bitcoinutils_patches import *
-
-VERSION=pkg_resources.get_distribution("block-io").version
+from .transport import HttpTransport
+from .cache import TTLCache, KeyCache
+from .retry import RetryPolicy, parse_retry_after
+from .signing import sign_digests
+from . import script_cache
+from . import bulk
+from .pagination import TransactionIterator, AddressIterator
+from .prepared import PreparedTransaction, format_satoshis
+from .decoder import decode_response
+from .serialize import serialize_transaction, multisig_script_sig, multisig_witness
+from . import tracing
+
+from .version import VERSION
+
+# bitcoinutils (which pulls in sympy), pycryptodome, requests and ecdsa take far longer to import than the rest
+# of the package, so each is imported where it is first needed
+# the names this module has always re-exported from bitcoinutils_patches are loaded on first access
+BITCOINUTILS_NAMES = frozenset(['bitcoinutils', 'bitcoinutils_setup', 'bitcoinutils_get_network', 'P2pkhAddress', 'PrivateKey', 'PublicKey',
+                                'P2shAddress', 'P2wshAddress', 'Address', 'Script', 'Transaction', 'TxInput', 'TxOutput',
+                                'get_output_script', 'signature_with_sighash', 'SegwitSighash', 'Decimal', 'ecdsa'])
+
+# submodules that importing block_io used to load, and so bind as attributes
+LAZY_SUBMODULES = frozenset(['bitcoinutils_patches', 'aio', 'pool'])
+
+def __getattr__(name):
+    if name in LAZY_SUBMODULES:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+    elif name in BITCOINUTILS_NAMES:
+        from . import bitcoinutils_patches
+        return getattr(bitcoinutils_patches, name)
+    elif name == 'AsyncBlockIo':
+        from .aio import AsyncBlockIo
+        return AsyncBlockIo
+    elif name == 'BlockIoPool':
+        from .pool import BlockIoPool
+        return BlockIoPool
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 class BlockIoInvalidResponseError(Exception):
     """Thrown when we receive an unexpected/unparseable response from Block.io"""
@@ -22,6 +57,8 @@ class BlockIoUnknownError(Exception):
 class BlockIoAPIThrottleError(Exception):
     """Thrown when API call gets throttled at Block.io."""
 
+    retry_after = None # seconds, from the Retry-After header if there was one
+
 class BlockIoAPIInternalError(Exception):
     """Thrown on 500-599 errors."""
 
@@ -37,16 +74,22 @@ class BlockIoAPIError(Exception):
 
 class BlockIo(object):
 
+    # seconds a key saved by prepare_sweep_transaction is kept if no signing call spends it
+    sweep_key_ttl = 600
+
     class Key:
         # wrapper around bitcoinutils.keys.PrivateKey
         def __init__(self, privkey, pubkey = None):
+            from .bitcoinutils_patches import PrivateKey
+
             # we will always use compressed public keys
-            self.private_key = bitcoinutils.keys.PrivateKey(secret_exponent=int(hexlify(privkey),16))
+            self.private_key = PrivateKey(secret_exponent=int(hexlify(privkey),16))
             self.public_key = self.private_key.get_public_key()
 
         @staticmethod
         def generate():
-            return BlockIo.Key(bitcoinutils.keys.PrivateKey().to_bytes(), None)
+            from .bitcoinutils_patches import PrivateKey
+            return BlockIo.Key(PrivateKey().to_bytes(), None)
 
         @staticmethod
         def from_privkey_hex(privkey):
@@ -54,7 +97,8 @@ class BlockIo(object):
         
         def sign(self, data_to_sign):
             # use the sign_input method from bitcoinutils.keys.PrivateKey
-            der_sig = self.private_key._sign_input(data_to_sign, bitcoinutils.constants.SIGHASH_ALL)
+            from bitcoinutils.constants import SIGHASH_ALL
+            der_sig = self.private_key._sign_input(data_to_sign, SIGHASH_ALL)
             return unhexlify(der_sig)
 
         def sign_hex(self, hex_data):
@@ -104,8 +148,9 @@ class BlockIo(object):
         @staticmethod
         def pinToAesKey(pin, salt = "", iterations = 2048, hashfn = sha256, phase1_key_length = 16, phase2_key_length = 32):
             # use pbkdf2 magic
-            ret = pbkdf2.pbkdf2(pin, phase1_key_length, salt, int(iterations/2), hashfn)
-            ret = pbkdf2.pbkdf2(hexlify(ret), phase2_key_length, salt, int(iterations/2), hashfn)
+            with tracing.span('key_stretch', iterations = iterations):
+                ret = pbkdf2.pbkdf2(pin, phase1_key_length, salt, int(iterations/2), hashfn)
+                ret = pbkdf2.pbkdf2(hexlify(ret), phase2_key_length, salt, int(iterations/2), hashfn)
             return hexlify(ret) # the encryption key
 
         @staticmethod
@@ -134,8 +179,9 @@ class BlockIo(object):
             aes_key = BlockIo.Helper.pinToAesKey(pin, algorithm['pbkdf2_salt'], algorithm['pbkdf2_iterations'],
                                   sha256, algorithm['pbkdf2_phase1_key_length'], algorithm['pbkdf2_phase2_key_length'])
 
-            decrypted = BlockIo.Helper.decrypt(user_key['encrypted_passphrase'], aes_key,
-                                               algorithm['aes_iv'], algorithm['aes_cipher'], algorithm['aes_auth_tag'])
+            with tracing.span('key_decrypt', cipher = algorithm['aes_cipher']):
+                decrypted = BlockIo.Helper.decrypt(user_key['encrypted_passphrase'], aes_key,
+                                                   algorithm['aes_iv'], algorithm['aes_cipher'], algorithm['aes_auth_tag'])
 
             return BlockIo.Key.from_passphrase(unhexlify(decrypted))
         
@@ -150,6 +196,8 @@ class BlockIo(object):
             # key in hex, data as string
             # returns ciphertext in base64
 
+            from Crypto.Cipher import AES
+
             key = unhexlify(key) # get bytes
 
             BS = 16
@@ -185,6 +233,8 @@ class BlockIo(object):
             # key in hex, b64data as base64 string
             # returns utf-8 string
 
+            from Crypto.Cipher import AES
+
             message = None
 
             try:
@@ -234,7 +284,7 @@ class BlockIo(object):
                 y_int = 256 * y_int + c
             return bytes((2+(y_int % 2),)) + x
 
-    def __init__(self, api_key, pin, version = 2):
+    def __init__(self, api_key, pin, version = 2, transport = None, pool_size = 10, timeout = None, keep_alive = True, key_cache = None, retry_policy = None, rate_limiter = None, response_cache = None, single_flight = None):
         # initiate the object
         self.api_key = api_key
         self.pin = pin
@@ -244,7 +294,44 @@ class BlockIo(object):
         self.base_url = 'https://block.io/api/v'+str(version)+'/API_CALL/?api_key='+api_key
         self.sweep_calls = ['prepare_sweep_transaction']
         self.request_headers = {'Accept': 'application/json', 'User-Agent': 'python:block_io:'+self.clientVersion}
-        self.private_keys = dict()
+        self.private_keys = TTLCache(max_size = 1024) # keys saved by sweep calls, see save_sweep_key
+
+        # the connection pool lives as long as this object does
+        # a custom transport is used as-is, and is not closed by us
+        self.owns_transport = transport is None
+
+        if transport is None:
+            transport = HttpTransport(pool_maxsize = pool_size, timeout = timeout, keep_alive = keep_alive)
+
+        self.transport = transport
+
+        # opt-in cache of decrypted signer keys, see KeyCache
+        self.key_cache = key_cache
+
+        # throttled and failed read-only calls are retried, see RetryPolicy
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        # opt-in client-side rate limit, see RateLimiter
+        self.rate_limiter = rate_limiter
+
+        # opt-in cache of read-only responses, see ResponseCache
+        self.response_cache = response_cache
+
+        # opt-in sharing of identical concurrent calls, see SingleFlight
+        self.single_flight = single_flight
+
+    def close(self):
+        # release pooled connections, if we own them, and drop any saved sweep keys
+        self.forget_sweep_keys()
+
+        if self.owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
         
     def __getattr__(self, attr, *args, **kwargs):
 
@@ -269,14 +356,44 @@ class BlockIo(object):
         kwargs['public_key'] = key.pubkey_hex().decode("utf-8")
 
         # save the key for later use
-        self.private_keys[key.pubkey_hex().decode('utf-8')] = PrivateKey(secret_exponent=int(key.privkey_hex().decode('utf-8'),16))
+        self.save_sweep_key(key)
         
         response = self.api_call(method, **kwargs)
 
         return response
 
+    def save_sweep_key(self, key):
+        # a sweep key stays in memory until a signing call spends it, forget_sweep_keys() or close() drops it,
+        # or sweep_key_ttl seconds pass, whichever comes first
+        from .bitcoinutils_patches import PrivateKey
+
+        self.private_keys.set(key.pubkey_hex().decode('utf-8'), PrivateKey(secret_exponent=int(key.privkey_hex().decode('utf-8'),16)), self.sweep_key_ttl)
+
+    def sweep_keys_for(self, prepared):
+        # the saved sweep keys this PreparedTransaction's inputs can use
+        sweep_keys = dict()
+
+        for address_data in prepared.address_data.values():
+            for public_key in address_data.public_keys:
+                private_key = self.private_keys.get(public_key)
+
+                if private_key is not None:
+                    sweep_keys[public_key] = private_key
+
+        return sweep_keys
+
+    def forget_sweep_keys(self, public_keys = None):
+        # drops the given saved sweep keys, or all of them
+        if public_keys is None:
+            self.private_keys.clear()
+            return
+
+        for public_key in public_keys:
+            self.private_keys.pop(public_key)
+
     def create_redeem_script(self, required_signatures, public_keys):
         # returns the redeem script given the ordered public_keys and required signatures
+        from .bitcoinutils_patches import Script
 
         script_elements = []
         script_elements.append('OP_' + str(required_signatures))
@@ -292,214 +409,275 @@ class BlockIo(object):
     def summarize_prepared_transaction(self, data):
         # returns summary of the prepared data
         # includes network fee, blockio fee, total amount to send
+        # sums are integer satoshis, formatted as amount strings only in the summary itself
 
-        inputs = data['data']['inputs']
-        outputs = data['data']['outputs']
+        prepared = PreparedTransaction.load(data)
 
-        network_fee = Decimal(0)
-        blockio_fee = Decimal(0)
-        change_amount = Decimal(0)
-        input_sum = Decimal(0)
-        output_sum = Decimal(0)
+        blockio_fee = 0
+        change_amount = 0
+        output_sum = 0
 
         # get the sum of coins being spent
-        for cur_input in inputs:
-            input_sum += Decimal(cur_input['input_value'])
+        input_sum = sum([cur_input.value for cur_input in prepared.inputs])
 
         # populate various categories of outputs
-        for cur_output in outputs:
-            if cur_output['output_category'] == 'blockio-fee':
-                blockio_fee += Decimal(cur_output['output_value'])
-            elif cur_output['output_category'] == 'change':
-                change_amount += Decimal(cur_output['output_value'])
+        for cur_output in prepared.outputs:
+            if cur_output.category == 'blockio-fee':
+                blockio_fee += cur_output.value
+            elif cur_output.category == 'change':
+                change_amount += cur_output.value
             else:
                 # user-specified
-                output_sum += Decimal(cur_output['output_value'])
+                output_sum += cur_output.value
 
         # summarize the data
-        return {"network": data['data']['network'],
-                "network_fee": format(input_sum - output_sum - change_amount - blockio_fee, '.8f'),
-                "blockio_fee": format(blockio_fee, '.8f'),
-                "total_amount_to_send": format(output_sum, '.8f')}
+        return {"network": prepared.network,
+                "network_fee": format_satoshis(input_sum - output_sum - change_amount - blockio_fee),
+                "blockio_fee": format_satoshis(blockio_fee),
+                "total_amount_to_send": format_satoshis(output_sum)}
     
-    def create_and_sign_transaction(self, prepare_data, keys = []):
+    def create_and_sign_transaction(self, prepare_data, keys = [], workers = None):
         # creates the specified transaction with the inputs and outputs
         # signs what we can and returns payload and signatures left to append, if any
+        # workers: number of processes (or a concurrent.futures.Executor) to sign inputs with, None signs here
+        from .bitcoinutils_patches import PrivateKey
+
+        # prepare_data is the prepare_*_transaction response, or a PreparedTransaction built from it
+        prepared = PreparedTransaction.load(prepare_data)
+
+        # signing keys are scoped to this call, so concurrent calls never see each other's keys
+        private_keys = self.sweep_keys_for(prepared)
 
-        # set the appropriate network first
-        bitcoinutils_patches.bitcoinutils_setup(prepare_data['data']['network'])
-        
         # save the provided keys so we can use them below
         for cur_key_hex in keys:
             cur_key = PrivateKey(secret_exponent=int(cur_key_hex,16))
-            self.private_keys[cur_key.get_public_key().to_hex(compressed=True)] = cur_key
+            private_keys[cur_key.get_public_key().to_hex(compressed=True)] = cur_key
 
-        if self.pin is None and 'user_key' in prepare_data['data'] and prepare_data['data']['user_key']['public_key'] not in self.private_keys:
-            raise BlockIoUnknownError("No PIN provided to decrypt signer private key.")
+        response = self.sign_prepared_transaction(prepared, private_keys, self.key_cache, workers)
+
+        # the sweep keys we used are done with
+        self.forget_sweep_keys(private_keys.keys())
         
-        # decrypt the signer private key if we can
-        if self.pin is not None and 'user_key' in prepare_data['data'] and prepare_data['data']['user_key']['public_key'] not in self.private_keys:
+        return response
 
-            key = self.Helper.dynamicExtractKey(prepare_data['data']['user_key'], self.pin)
+    def create_and_sign_transactions(self, prepared_transactions, keys = [], workers = None):
+        # batch version of create_and_sign_transaction
+        # keys are parsed once, each distinct user_key is decrypted once, and redeem scripts are shared by the batch
+        # returns a list in the same order: the response for each transaction, or the exception it raised
+        from concurrent.futures import Executor, ProcessPoolExecutor
+        from .bitcoinutils_patches import PrivateKey
 
-            if (key.pubkey_hex().decode('utf-8') != prepare_data['data']['user_key']['public_key']):
-                raise Exception("Expected pubkey=",prepare_data['data']['user_key']['public_key'],"but got pubkey=",key.pubkey_hex(),". Invalid PIN provided.")
-            
-            self.private_keys[key.pubkey_hex().decode('utf-8')] = PrivateKey(secret_exponent=int(key.privkey_hex().decode('utf-8'),16))
+        # the provided keys
+        signer_keys = dict()
 
-        # we can create the transaction now
-        inputs = prepare_data['data']['inputs']
-        outputs = prepare_data['data']['outputs']
+        for cur_key_hex in keys:
+            cur_key = PrivateKey(secret_exponent=int(cur_key_hex,16))
+            signer_keys[cur_key.get_public_key().to_hex(compressed=True)] = cur_key
 
-        # create a dictionary for these input addresses
-        input_address_data = prepare_data['data']['input_address_data']
-        address_data = dict()
+        # decrypted user keys live only as long as the batch, unless we have a key cache
+        key_cache = self.key_cache if self.key_cache is not None else KeyCache(max_size = len(prepared_transactions) + 1, ttl = None)
+        used_sweep_keys = set()
+        executor = None
 
-        for input_address in input_address_data:
-            address_data[input_address['address']] = input_address
-            
-        has_segwit_inputs = False
+        if workers is not None and not isinstance(workers, Executor) and workers > 1:
+            # one pool for the whole batch
+            executor = ProcessPoolExecutor(max_workers = workers)
+            workers = executor
+
+        results = []
+
+        try:
+            for prepare_data in prepared_transactions:
+                try:
+                    # each transaction starts from the same keys, plus saved sweep keys for its inputs
+                    prepared = PreparedTransaction.load(prepare_data)
+                    sweep_keys = self.sweep_keys_for(prepared)
+                    used_sweep_keys.update(sweep_keys.keys())
+
+                    private_keys = dict(sweep_keys)
+                    private_keys.update(signer_keys)
+
+                    results.append(self.sign_prepared_transaction(prepared, private_keys, key_cache, workers))
+                except Exception as e:
+                    results.append(e)
+        finally:
+            self.forget_sweep_keys(used_sweep_keys)
+
+            if key_cache is not self.key_cache:
+                key_cache.clear()
+
+            if executor is not None:
+                executor.shutdown()
+
+        return results
+
+    def sign_prepared_transaction(self, prepared, private_keys, key_cache, workers):
+        # does the work for create_and_sign_transaction(s), on the PreparedTransaction model
+        # private_keys (public key hex -> PrivateKey) belongs to this call, a decrypted user key is added to it
+        # key_cache (may be None) holds decrypted user keys
+        # the network comes from the prepared transaction, the process-global bitcoinutils network is not used
+        from .bitcoinutils_patches import PrivateKey, Script, Transaction, TxInput, TxOutput, SegwitSighash, signature_with_sighash
+        network = prepared.network
+        user_key = prepared.user_key
+
+        if self.pin is None and user_key is not None and user_key['public_key'] not in private_keys:
+            raise BlockIoUnknownError("No PIN provided to decrypt signer private key.")
         
-        # create the transaction
+        # decrypt the signer private key if we can
+        if self.pin is not None and user_key is not None and user_key['public_key'] not in private_keys:
 
-        # inputs
-        tx_inputs = []
+            cached_key = None if key_cache is None else key_cache.get_key(user_key, self.pin)
 
-        for cur_input in inputs:
-            tx_input = TxInput(cur_input['previous_txid'], cur_input['previous_output_index'])
-            cur_address_data = address_data[cur_input['spending_address']]
-            cur_address_type = cur_address_data['address_type']
+            if cached_key is not None:
+                # skip key stretching and decryption, we've done it already
+                private_keys[user_key['public_key']] = cached_key
+            else:
+                key = self.Helper.dynamicExtractKey(user_key, self.pin)
 
-            # if this transaction has any segwit inputs, set has_segwit_inputs
-            if (cur_address_type == 'P2WSH-over-P2SH' or
-                cur_address_type == 'P2WPKH-over-P2SH' or
-                cur_address_type == 'P2WPKH' or
-                cur_address_type == 'WITNESS_V0'):
-                has_segwit_inputs = True
+                if (key.pubkey_hex().decode('utf-8') != user_key['public_key']):
+                    raise Exception("Expected pubkey=",user_key['public_key'],"but got pubkey=",key.pubkey_hex(),". Invalid PIN provided.")
+            
+                private_keys[key.pubkey_hex().decode('utf-8')] = PrivateKey(secret_exponent=int(key.privkey_hex().decode('utf-8'),16))
 
-            tx_inputs.append(tx_input)
+                if key_cache is not None:
+                    key_cache.set_key(user_key, self.pin, private_keys[user_key['public_key']])
 
-        # outputs
-        tx_outputs = []
+        # we can create the transaction now
+        inputs = prepared.inputs
         
-        for cur_output in outputs:
-            tx_output = TxOutput(bitcoinutils.utils.to_satoshis(cur_output['output_value']), get_output_script(cur_output['receiving_address']))
-            tx_outputs.append(tx_output)
+        # inputs
+        tx_inputs = [TxInput(cur_input.previous_txid, cur_input.previous_output_index) for cur_input in inputs]
+
+        # outputs
+        tx_outputs = [TxOutput(cur_output.value, script_cache.output_script(cur_output.receiving_address, network)) for cur_output in prepared.outputs]
 
-        tx = Transaction(tx_inputs, tx_outputs, has_segwit=has_segwit_inputs)
+        tx = Transaction(tx_inputs, tx_outputs, has_segwit=prepared.has_segwit_inputs)
 
         # if we have expected unsigned txid, make sure this library's serialized the unsigned transaction properly
-        if 'expected_unsigned_txid' in prepare_data['data'] and prepare_data['data']['expected_unsigned_txid'] is not None:
-            if prepare_data['data']['expected_unsigned_txid'] != tx.get_txid():
+        if prepared.expected_unsigned_txid is not None:
+            if prepared.expected_unsigned_txid != tx.get_txid():
                 raise Exception("Expected unsigned transaction ID mismatch. Please report this error to support@block.io.")
                 
         # start signing inputs
         signatures = []
         signatures_dict = dict() # makes our job easier for when we need to serialize the transaction with signatures
         tx_fully_signed = True # assume tx will be fully signed
+
+        # BIP143 midstates, shared by every segwit input and key
+        segwit_sighash = SegwitSighash(tx) if prepared.has_segwit_inputs else None
+
+        # work out what we can sign: each input's digest is computed once and signed by each of our keys
+        sign_jobs = [] # (input_index, public_key, digest), in the order signatures are returned
+        sighash_span = tracing.start_span('sighash', inputs = len(inputs))
         
         for cur_input in inputs:
-            cur_address_data = address_data[cur_input['spending_address']]
-            cur_public_keys = cur_address_data['public_keys']
-            cur_address_type = cur_address_data['address_type']
-            cur_required_signatures = cur_address_data['required_signatures']
-            cur_signatures = dict()
+            cur_address_data = cur_input.address_data
+            cur_public_keys = cur_address_data.public_keys
+            cur_address_type = cur_address_data.address_type
+            cur_required_signatures = cur_address_data.required_signatures
+            cur_signature_count = 0
+            cur_digest = None
             
             if cur_address_type == 'P2SH' or cur_address_type == 'P2WSH-over-P2SH' or cur_address_type == 'WITNESS_V0':
                 # P2SH, or P2WSH-over-P2SH, or P2WSH (WITNESS_V0) input
 
-                redeem_script = self.create_redeem_script(cur_required_signatures, cur_public_keys)
+                redeem_script = script_cache.redeem_script(cur_required_signatures, cur_public_keys)
                 
                 # sign for each public key, if we can
                 for public_key in cur_public_keys:
-                    if (public_key in self.private_keys):
-                        if (cur_address_type == 'P2SH'):
-                            # P2SH address
-                            cur_signatures[public_key] = self.private_keys[public_key].sign_input(tx, cur_input['input_index'], redeem_script)
-                        else:
-                            # witness input
-                            cur_signatures[public_key] = self.private_keys[public_key].sign_segwit_input(tx,
-                                                                                                         cur_input['input_index'],
-                                                                                                         redeem_script,
-                                                                                                         bitcoinutils.utils.to_satoshis(cur_input['input_value']))
+                    if (public_key in private_keys):
+                        if cur_digest is None:
+                            if (cur_address_type == 'P2SH'):
+                                # P2SH address
+                                cur_digest = tx.get_transaction_digest(cur_input.input_index, redeem_script)
+                            else:
+                                # witness input
+                                cur_digest = segwit_sighash.digest(cur_input.input_index, redeem_script, cur_input.value)
+
+                        sign_jobs.append((cur_input.input_index, public_key, cur_digest))
+                        cur_signature_count += 1
                             
-                if (len(cur_signatures) < cur_required_signatures):
+                if (cur_signature_count < cur_required_signatures):
                     # transaction is going to be missing signatures
                     # we'll need to use Block.io's signatures as well
                     tx_fully_signed = False
 
             elif cur_address_type == 'P2PKH' or cur_address_type == 'P2WPKH-over-P2SH' or cur_address_type == 'P2WPKH':
-                pkh_script = get_output_script(PublicKey(cur_public_keys[0]).get_address().to_string())
+                pkh_script = script_cache.p2pkh_script(cur_public_keys[0])
 
-                if (cur_public_keys[0] in self.private_keys):
+                if (cur_public_keys[0] in private_keys):
                     if cur_address_type == 'P2PKH':
                         # P2PKH address
-                        cur_signatures[cur_public_keys[0]] = self.private_keys[cur_public_keys[0]].sign_input(tx, cur_input['input_index'], pkh_script)
+                        cur_digest = tx.get_transaction_digest(cur_input.input_index, pkh_script)
                     else:
                         # witness input
-                        cur_signatures[cur_public_keys[0]] = self.private_keys[cur_public_keys[0]].sign_segwit_input(tx,
-                                                                                                                     cur_input['input_index'],
-                                                                                                                     pkh_script,
-                                                                                                                     bitcoinutils.utils.to_satoshis(cur_input['input_value']))
+                        cur_digest = segwit_sighash.digest(cur_input.input_index, pkh_script, cur_input.value)
+
+                    sign_jobs.append((cur_input.input_index, cur_public_keys[0], cur_digest))
 
             else:
                 raise Exception("Unrecognized address type:", cur_address_type)
 
-            # signatures done here for this input
+        sighash_span.finish()
+
+        # sign everything, here or across worker processes
+        # signatures are deterministic (RFC6979), so the result doesn't depend on workers
+        with tracing.span('sign', signatures = len(sign_jobs)):
+            der_signatures = sign_digests([(private_keys[public_key], digest) for (input_index, public_key, digest) in sign_jobs], workers)
+
+        tracing.count('signatures', len(der_signatures))
+
+        for ((input_index, public_key, digest), der_signature) in zip(sign_jobs, der_signatures):
             # append signatures to our signatures array
-            for public_key in cur_signatures:
-                signatures.append({'public_key': public_key, 'signature': cur_signatures[public_key].decode('utf-8'), 'input_index': cur_input['input_index']})
+            signatures.append({'public_key': public_key, 'signature': der_signature.decode('utf-8'), 'input_index': input_index})
 
-                if (str(cur_input['input_index']) not in signatures_dict):
-                    signatures_dict[str(cur_input['input_index'])] = dict()
+            if (str(input_index) not in signatures_dict):
+                signatures_dict[str(input_index)] = dict()
 
-                signatures_dict[str(cur_input['input_index'])][public_key] = cur_signatures[public_key]
+            signatures_dict[str(input_index)][public_key] = der_signature
 
         # this will be our response object
-        response = {"tx_type": prepare_data['data']['tx_type'], "tx_hex": None, "signatures": None}
+        response = {"tx_type": prepared.tx_type, "tx_hex": None, "signatures": None}
         
         if tx_fully_signed == True:
             # if the transaction is fully signed, we will just serialize it with all the signatures
 
             for cur_input in inputs:
                 # for each input, prepare the script_sig and/or witnesses
-                cur_address_data = address_data[cur_input['spending_address']]
-                cur_public_keys = cur_address_data['public_keys']
-                cur_address_type = cur_address_data['address_type']
-                cur_input_index = cur_input['input_index']
+                cur_address_data = cur_input.address_data
+                cur_public_keys = cur_address_data.public_keys
+                cur_address_type = cur_address_data.address_type
+                cur_required_signatures = cur_address_data.required_signatures
+                cur_input_index = cur_input.input_index
                 
-                if cur_address_data['required_signatures'] > 1:
+                if cur_required_signatures > 1:
                     # P2SH, P2WSH-over-P2SH, or P2WSH (WITNESS_V0) input
 
-                    # we will need the redeem script now
-                    redeem_script = self.create_redeem_script(cur_address_data['required_signatures'], cur_public_keys)
-                    script_elements = ["OP_0"] # the blank push
+                    # assembled from bytes: the redeem script and the P2WSH-over-P2SH scriptSig are built once per address,
+                    # and each input only adds its signatures
+                    redeem_script = script_cache.redeem_script_bytes(cur_required_signatures, cur_public_keys)
+                    input_signatures = []
 
-                    signatures_left = cur_address_data['required_signatures'] + 0
-                    
                     for public_key in cur_public_keys:
-                        if (signatures_left > 0):
+                        if (len(input_signatures) < cur_required_signatures):
                             # append signatures only if we haven't reached the required number of signatures yet
                             if public_key in signatures_dict[str(cur_input_index)]:
-                                script_elements.append(signature_with_sighash(signatures_dict[str(cur_input_index)][public_key]))
-                                signatures_left = signatures_left - 1
+                                input_signatures.append(unhexlify(signatures_dict[str(cur_input_index)][public_key]) + b'\x01') # SIGHASH_ALL
+
+                    signatures_left = cur_required_signatures - len(input_signatures)
 
                     if (signatures_left > 0):
                         raise BlockIoUnknownError("Signatures left should be zero, but signatures_left=", signatures_left)
 
-                    script_elements.append(redeem_script.to_hex())
-
-                    script_sig = Script(script_elements)
-
                     if cur_address_type == "P2SH":
-                        tx_inputs[cur_input_index].script_sig = script_sig
+                        tx_inputs[cur_input_index].script_sig = multisig_script_sig(input_signatures, redeem_script)
                     else:
                         # P2WSH-over-P2SH and P2WSH (WITNESS_V0)
-                        tx.witnesses.append(script_sig)
+                        tx.witnesses.append(multisig_witness(input_signatures, redeem_script))
 
                     if cur_address_type == "P2WSH-over-P2SH":
                         # needs script_sig set as well
-                        tx_inputs[cur_input_index].script_sig = Script([get_output_script(P2wshAddress.from_script(redeem_script).to_string()).to_hex()])
+                        tx_inputs[cur_input_index].script_sig = script_cache.p2wsh_script_sig(cur_required_signatures, cur_public_keys)
                         
                 else:
                     # P2PKH, P2WPKH-over-P2SH, or P2WPKH
@@ -514,23 +692,104 @@ class BlockIo(object):
 
                     if cur_address_type == "P2WPKH-over-P2SH":
                         # needs script_sig set as well
-                        tx_inputs[cur_input_index].script_sig = Script([get_output_script(PublicKey(cur_public_keys[0]).get_segwit_address().to_string()).to_hex()])
+                        tx_inputs[cur_input_index].script_sig = Script([script_cache.p2wpkh_program(cur_public_keys[0])])
 
 
         if (tx_fully_signed == False):
             # we have signatures to append
             response["signatures"] = signatures
             
-        response["tx_hex"] = tx.serialize() # the payload
+        with tracing.span('serialize'):
+            response["tx_hex"] = serialize_transaction(tx) # the payload
 
-        # remove all private keys from self
-        self.private_keys = dict()
-        
         return response
 
+    def map_call(self, method, kwargs_list, concurrency = 4, chunk_size = bulk.CHUNK_SIZE):
+        # the same method for many sets of arguments, e.g. get_address_balance for thousands of labels
+        # single labels or addresses are packed into multi-value calls, and up to concurrency calls run at once
+        # yields (kwargs, response or the exception it raised) for each item, as responses arrive
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        calls = iter(bulk.plan_calls(method, kwargs_list, chunk_size))
+
+        with ThreadPoolExecutor(max_workers = concurrency) as executor:
+            # calls are planned as they are sent and only concurrency are in flight, so huge inputs don't pile up in memory
+            pending = set([executor.submit(self.run_bulk_call, call) for call in itertools.islice(calls, concurrency)])
+
+            try:
+                while len(pending) > 0:
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+
+                    for future in done:
+                        for call in itertools.islice(calls, 1):
+                            pending.add(executor.submit(self.run_bulk_call, call))
+
+                        for result in future.result():
+                            yield result
+            finally:
+                # the caller stopped early
+                for future in pending:
+                    future.cancel()
+
+    def iter_transactions(self, checkpoint = None, prefetch = True, method = 'get_transactions', **kwargs):
+        # every transaction of the given kwargs (e.g. type = "received"), one at a time, newest first
+        # method can also be 'get_dtrust_transactions', see TransactionIterator for checkpoints
+        return TransactionIterator(self, method, kwargs, checkpoint, prefetch)
+
+    def iter_addresses(self, checkpoint = None, prefetch = True, method = 'get_my_addresses', **kwargs):
+        # every address on the account, one at a time, see AddressIterator for checkpoints
+        return AddressIterator(self, method, kwargs, checkpoint, prefetch)
+
+    def run_bulk_call(self, call):
+        # returns [(kwargs, response or exception)] for each item the call answers
+        try:
+            response = self.api_call(call.method, **call.kwargs)
+        except BlockIoAPIError as e:
+            if len(call.items) == 1:
+                return [(call.items[0], e)]
+
+            # one bad label fails the whole call, so ask for each item on its own
+            return [result for item in call.items for result in self.run_bulk_call(bulk.BulkCall(call.method, item, [item]))]
+        except Exception as e:
+            return [(item, e) for item in call.items]
+
+        return [(item, result if result is not None else BlockIoInvalidResponseError("Failed, no response for %s received from Block.io, method %s" % (item, call.method)))
+                for (item, result) in bulk.split_response(call, response)]
+
     def api_call(self, method, **kwargs):
-        # the actual API call
+        # the actual API call, retried as the retry policy allows
+        send = lambda: self.retry_policy.call(method, lambda: self.send_api_call(method, kwargs))
+
+        if self.single_flight is not None:
+            send = functools.partial(self.single_flight.call, self.api_key, method, kwargs, send)
+
+        with tracing.span('api_call', method = method):
+            if self.response_cache is not None:
+                return self.response_cache.call(self.api_key, method, kwargs, send)
+
+            return send()
+
+    def send_api_call(self, method, kwargs):
+        # one attempt at an API call
 
+        if self.rate_limiter is not None:
+            # wait our turn
+            self.rate_limiter.acquire(self.api_key, method)
+
+        # send it over the pooled transport
+        with tracing.span('http_request', method = method) as tags:
+            response = self.transport.post(self.api_url(method), json = self.api_payload(kwargs), headers = self.request_headers)
+            tags['status_code'] = response.status_code
+
+        if tracing.observer is not None:
+            tracing.count('http_response_bytes', len(getattr(response, 'content', None) or b''), method = method)
+
+        return self.process_response(method, response)
+
+    def api_url(self, method):
+        return self.base_url.replace('API_CALL',method)
+
+    def api_payload(self, kwargs):
         # http parameters
         payload = {}
 
@@ -539,37 +798,53 @@ class BlockIo(object):
 
         payload.update(kwargs)
 
-        # update the parameters with the API key
-        session = requests.session()
-        response = session.post(self.base_url.replace('API_CALL',method), json = payload, headers = self.request_headers)
+        return payload
+
+    def process_response(self, method, response):
+        # checks the transport's response and returns its JSON data
+        response_object = response
         status_code = response.status_code
         
         try:
-            response = response.json() # convert response to JSON
+            with tracing.span('json_decode', method = method):
+                response = decode_response(response) # convert response to JSON
         except:
             response = {}
 
-        session.close() # we're done with it, let's close it
+        error = None
 
         if not ('status' in response.keys()):
             # unexpected response
-            raise BlockIoInvalidResponseError("Failed, invalid response received from Block.io, method %s" % method)
+            error = BlockIoInvalidResponseError("Failed, invalid response received from Block.io, method %s" % method)
         elif ('status' in response.keys()) and (response['status'] == 'fail'):
 
             # give the user the raw response as well in the exception object
-            api_error = BlockIoAPIError(response['data']['error_message'])
-            api_error.set_raw_data(response)
-
-            raise api_error
+            error = BlockIoAPIError(response['data']['error_message'])
+            error.set_raw_data(response)
 
         elif 500 <= status_code <= 599:
             # using the status_code since a JSON response was not provided
-            raise BlockIoAPIInternalError("API call to Block.io failed externally, method %s" % method)
+            error = BlockIoAPIInternalError("API call to Block.io failed externally, method %s" % method)
         elif 419 <= status_code <= 420:
             # using the status_code since a JSON response was not provided
-            raise BlockIoAPIThrottleError("API call got throttled by rate limits at Block.io, method %s" % method)
+            error = BlockIoAPIThrottleError("API call got throttled by rate limits at Block.io, method %s" % method)
         elif not (200 <= status_code <= 299):
             # using the status_code since a JSON response was not provided
-            raise BlockIoUnknownError("Unknown error occurred when querying Block.io, method %s" % method)
+            error = BlockIoUnknownError("Unknown error occurred when querying Block.io, method %s" % method)
+
+        if error is not None:
+            # the retry policy goes by the HTTP status too, e.g. for a gateway's HTML 503 or a 420 with a 'fail' body
+            error.status_code = status_code
+
+            if 419 <= status_code <= 420:
+                error.retry_after = parse_retry_after(getattr(response_object, 'headers', {}).get('Retry-After'))
+
+            raise error
 
         return response
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ before Python 3.7 (PEP 562), so import everything up front
+    from .bitcoinutils_patches import *
+    from .aio import AsyncBlockIo
+    from .pool import BlockIoPool
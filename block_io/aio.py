@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import itertools
+
+from . import BlockIo, BlockIoAPIError, BlockIoInvalidResponseError
+from . import bulk
+from .decoder import get_json_decoder
+from . import tracing
+
+class AsyncResponse(object):
+    # the bits of a response that BlockIo.process_response looks at
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return get_json_decoder()(self.content)
+
+class AsyncHttpTransport(object):
+    # non-blocking, pooled HTTP transport for AsyncBlockIo (requires aiohttp)
+    # any object with async post(url, json, headers) and async close() can be used in its place
+
+    def __init__(self, pool_size = 10, timeout = None, keep_alive = True):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("AsyncBlockIo requires aiohttp. Install it with: pip3 install block-io[async]")
+
+        self.aiohttp = aiohttp
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.session = None
+
+    def get_session(self):
+        # the session is created on first use, so it binds to the running event loop
+        if self.session is None or self.session.closed:
+            connector = self.aiohttp.TCPConnector(limit = self.pool_size, force_close = not self.keep_alive)
+            self.session = self.aiohttp.ClientSession(connector = connector, timeout = self.aiohttp.ClientTimeout(total = self.timeout))
+
+        return self.session
+
+    async def post(self, url, json, headers):
+        async with self.get_session().post(url, json = json, headers = headers) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, response.headers, content)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+class AsyncBlockIo(BlockIo):
+    # asyncio flavour of BlockIo: every API method is a coroutine
+    # signing runs in an executor so it never blocks the event loop
+
+    def __init__(self, api_key, pin, version = 2, transport = None, pool_size = 10, timeout = None, keep_alive = True, key_cache = None, retry_policy = None, rate_limiter = None, response_cache = None, single_flight = None, executor = None):
+        owns_transport = transport is None
+
+        if transport is None:
+            transport = AsyncHttpTransport(pool_size = pool_size, timeout = timeout, keep_alive = keep_alive)
+
+        super().__init__(api_key, pin, version, transport = transport, key_cache = key_cache, retry_policy = retry_policy, rate_limiter = rate_limiter, response_cache = response_cache, single_flight = single_flight)
+
+        self.owns_transport = owns_transport
+        self.executor = executor # None uses the event loop's default executor
+
+    async def close(self):
+        # release pooled connections, if we own them, and drop any saved sweep keys
+        self.forget_sweep_keys()
+
+        if self.owns_transport:
+            await self.transport.close()
+
+    def __enter__(self):
+        # close() is a coroutine, it can't be awaited from a plain with block
+        raise TypeError("Use 'async with AsyncBlockIo(...)' instead of 'with'.")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def internal_prepare_sweep_transaction(self, method, **kwargs):
+        # sweep call meta
+
+        key = self.Key.from_wif(kwargs['private_key'])
+
+        del kwargs['private_key'] # remove the key, we're not going to pass it on
+        kwargs['public_key'] = key.pubkey_hex().decode("utf-8")
+
+        # save the key for later use
+        self.save_sweep_key(key)
+
+        response = await self.api_call(method, **kwargs)
+
+        return response
+
+    async def create_and_sign_transaction(self, prepare_data, keys = [], workers = None):
+        # key derivation and signing are CPU-bound, so keep them off the event loop
+        # get_event_loop returns the running loop inside a coroutine, get_running_loop is 3.7+
+        loop = asyncio.get_event_loop()
+        sign = functools.partial(BlockIo.create_and_sign_transaction, self, prepare_data, keys, workers)
+
+        return await loop.run_in_executor(self.executor, sign)
+
+    async def create_and_sign_transactions(self, prepared_transactions, keys = [], workers = None):
+        loop = asyncio.get_event_loop()
+        sign = functools.partial(BlockIo.create_and_sign_transactions, self, prepared_transactions, keys, workers)
+
+        return await loop.run_in_executor(self.executor, sign)
+
+    async def map_call(self, method, kwargs_list, concurrency = 4, chunk_size = bulk.CHUNK_SIZE):
+        # asyncio version of BlockIo.map_call, an async generator
+        calls = iter(bulk.plan_calls(method, kwargs_list, chunk_size))
+        pending = set([asyncio.ensure_future(self.run_bulk_call(call)) for call in itertools.islice(calls, concurrency)])
+
+        try:
+            while len(pending) > 0:
+                done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    for call in itertools.islice(calls, 1):
+                        pending.add(asyncio.ensure_future(self.run_bulk_call(call)))
+
+                    for result in task.result():
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run_bulk_call(self, call):
+        try:
+            response = await self.api_call(call.method, **call.kwargs)
+        except BlockIoAPIError as e:
+            if len(call.items) == 1:
+                return [(call.items[0], e)]
+
+            results = []
+
+            for item in call.items:
+                results.extend(await self.run_bulk_call(bulk.BulkCall(call.method, item, [item])))
+
+            return results
+        except Exception as e:
+            return [(item, e) for item in call.items]
+
+        return [(item, result if result is not None else BlockIoInvalidResponseError("Failed, no response for %s received from Block.io, method %s" % (item, call.method)))
+                for (item, result) in bulk.split_response(call, response)]
+
+    async def api_call(self, method, **kwargs):
+        # the actual API call, retried as the retry policy allows
+        send = lambda: self.retry_policy.acall(method, lambda: self.send_api_call(method, kwargs))
+
+        if self.single_flight is not None:
+            send = functools.partial(self.single_flight.acall, self.api_key, method, kwargs, send)
+
+        with tracing.span('api_call', method = method):
+            if self.response_cache is not None:
+                return await self.response_cache.acall(self.api_key, method, kwargs, send)
+
+            return await send()
+
+    async def send_api_call(self, method, kwargs):
+        # one attempt at an API call
+
+        if self.rate_limiter is not None:
+            # wait our turn, without blocking the event loop
+            await self.rate_limiter.aacquire(self.api_key, method)
+
+        # send it over the pooled, non-blocking transport
+        with tracing.span('http_request', method = method) as tags:
+            response = await self.transport.post(self.api_url(method), json = self.api_payload(kwargs), headers = self.request_headers)
+            tags['status_code'] = response.status_code
+
+        if tracing.observer is not None:
+            tracing.count('http_response_bytes', len(getattr(response, 'content', None) or b''), method = method)
+
+        return self.process_response(method, response)
@@ -1,9 +1,9 @@
 from decimal import Decimal
 from binascii import hexlify, unhexlify
 import hashlib
-import ecdsa
 import bitcoinutils.constants
 import bitcoinutils.bech32
+import bitcoinutils.utils
 import base58
 
 bitcoinutils.constants.NETWORK_WIF_PREFIXES = { 'BTC': b'\x80',
@@ -46,6 +46,9 @@ from bitcoinutils.keys import P2pkhAddress, PrivateKey, PublicKey, P2shAddress,
 from bitcoinutils.script import Script
 from bitcoinutils.transactions import Transaction, TxInput, TxOutput
 
+from .signing import get_signing_backend
+from .serialize import stream_transaction
+
 # add p2sh_address.to_script_pub_key()
 def added_p2sh_to_script_pub_key(self):
     return Script(['OP_HASH160', self.to_hash160(), 'OP_EQUAL'])
@@ -57,28 +60,29 @@ bitcoinutils.keys.P2shAddress.to_script_pub_key = added_p2sh_to_script_pub_key
 def low_r_sign_input(self, tx_digest, sighash=bitcoinutils.constants.SIGHASH_ALL):
     # unlike the overriden method, this does not append SIGHASH_ALL,
     # so we'll do it ourselves if we add signatures to serialize the transaction
-    counter = 0
-    der_sig = None
-    
-    while True:
-        extra_entropy = b""
-        if (counter > 0):
-            extra_entropy = (counter).to_bytes(32, byteorder="little") # bytearray.fromhex(hex(counter).split("x")[1].rjust(64,"0"))[::-1]
-        der_sig = hexlify(self.key.sign_digest_deterministic(tx_digest, hashlib.sha256, ecdsa.util.sigencode_der_canonize, extra_entropy))
-        if (int(der_sig[6:8],16) == 32 and int(der_sig[8:10],16) < 128):
-            break
-        counter = counter + 1
-            
-    return der_sig
+    # the signing itself is done by the pluggable backend, see block_io.signing
+    return get_signing_backend().sign(self, tx_digest)
         
 bitcoinutils.keys.PrivateKey._sign_input = low_r_sign_input
 ####
 
+# override to serialize in linear time, see block_io.serialize
+# get_txid and the legacy sighash serialize the whole transaction, so large P2SH transactions need this too
+def linear_stream(self, has_segwit):
+    return stream_transaction(self, has_segwit)
+
+bitcoinutils.transactions.Transaction.stream = linear_stream
+####
+
 # return output script given address
-def get_output_script(address):
+# network defaults to the one set up with bitcoinutils_setup, pass it to avoid depending on that global
+def get_output_script(address, network = None):
+
+    if network is None:
+        network = bitcoinutils_get_network()
 
     # try to see if this a valid bech32 address
-    decoded_bech32 = bitcoinutils.bech32.decode(bitcoinutils.constants.NETWORK_SEGWIT_PREFIXES[bitcoinutils_get_network()], address)
+    decoded_bech32 = bitcoinutils.bech32.decode(bitcoinutils.constants.NETWORK_SEGWIT_PREFIXES[network], address)
     output_script = None
     
     if (decoded_bech32[0] is None or decoded_bech32[1] is None):
@@ -95,9 +99,9 @@ def get_output_script(address):
             raise Exception("Invalid P2SH/P2PKH address checksum")
 
         # the address is fine, let's figure out if it's P2SH or P2PKH format
-        if (bitcoinutils.constants.NETWORK_P2SH_PREFIXES[bitcoinutils_get_network()] == unhexlify(network_prefix)):
+        if (bitcoinutils.constants.NETWORK_P2SH_PREFIXES[network] == unhexlify(network_prefix)):
             output_script = Script(['OP_HASH160', address_hash160, 'OP_EQUAL'])
-        elif (bitcoinutils.constants.NETWORK_P2PKH_PREFIXES[bitcoinutils_get_network()] == unhexlify(network_prefix)):
+        elif (bitcoinutils.constants.NETWORK_P2PKH_PREFIXES[network] == unhexlify(network_prefix)):
             output_script = Script(['OP_DUP', 'OP_HASH160', address_hash160, 'OP_EQUALVERIFY', 'OP_CHECKSIG'])
         else:
             raise Exception("Invalid address provided")
@@ -117,3 +121,45 @@ def signature_with_sighash(signature, sighash = bitcoinutils.constants.SIGHASH_A
     # takes signature as a hex
     return hexlify(unhexlify(signature) + (sighash).to_bytes(1, byteorder="big")) # byte order doesn't matter here since it's just one byte struct.pack('B', sighash))
 ####
+
+# BIP143 signature hashes for the inputs of one transaction
+# hashPrevouts, hashSequence and hashOutputs are computed once and shared by every input and key,
+# so signing N segwit inputs is O(N) instead of O(N^2)
+# the transaction's inputs and outputs must not change while this is in use
+class SegwitSighash(object):
+
+    def __init__(self, tx):
+        self.tx = tx
+
+        prevouts = b''.join([(int(txin.txid,16)).to_bytes(32, byteorder="little") + (txin.txout_index).to_bytes(4, byteorder="little") for txin in tx.inputs])
+        sequences = b''.join([txin.sequence for txin in tx.inputs])
+        outputs = b''.join([txout.stream() for txout in tx.outputs])
+
+        self.hash_prevouts = hashlib.sha256(hashlib.sha256(prevouts).digest()).digest()
+        self.hash_sequence = hashlib.sha256(hashlib.sha256(sequences).digest()).digest()
+        self.hash_outputs = hashlib.sha256(hashlib.sha256(outputs).digest()).digest()
+
+    def digest(self, txin_index, script, amount, sighash = bitcoinutils.constants.SIGHASH_ALL):
+        # same result as Transaction.get_transaction_segwit_digest
+        if sighash != bitcoinutils.constants.SIGHASH_ALL:
+            # other sighash types don't use all three midstates
+            return self.tx.get_transaction_segwit_digest(txin_index, script, amount, sighash)
+
+        txin = self.tx.inputs[txin_index]
+        script_bytes = script.to_bytes()
+
+        tx_for_signing = b''.join([self.tx.version,
+                                   self.hash_prevouts,
+                                   self.hash_sequence,
+                                   (int(txin.txid,16)).to_bytes(32, byteorder="little"),
+                                   (txin.txout_index).to_bytes(4, byteorder="little"),
+                                   bitcoinutils.utils.encode_var_int(len(script_bytes)),
+                                   script_bytes,
+                                   (amount).to_bytes(8, byteorder="little"),
+                                   txin.sequence,
+                                   self.hash_outputs,
+                                   self.tx.locktime,
+                                   (sighash).to_bytes(4, byteorder="little")])
+
+        return hashlib.sha256(hashlib.sha256(tx_for_signing).digest()).digest()
+####
@@ -0,0 +1,79 @@
+# helpers for BlockIo.map_call: packing many single-value calls into the API's comma-separated
+# multi-value parameters, and splitting the responses back up
+
+# method -> {single-value parameter: (multi-value parameter, field identifying each entry in data.balances)}
+MULTI_VALUE_PARAMS = {
+    'get_address_balance': {'label': ('labels', 'label'), 'labels': ('labels', 'label'),
+                            'address': ('addresses', 'address'), 'addresses': ('addresses', 'address')},
+    'get_dtrust_address_balance': {'label': ('labels', 'label'), 'labels': ('labels', 'label'),
+                                   'address': ('addresses', 'address'), 'addresses': ('addresses', 'address')}
+}
+
+# Block.io limits how many values one call may carry
+CHUNK_SIZE = 100
+
+class BulkCall(object):
+    # one API call made on behalf of one or more of map_call's items
+
+    def __init__(self, method, kwargs, items, field = None):
+        self.method = method
+        self.kwargs = kwargs
+        self.items = items # the caller's kwargs this call answers
+        self.field = field # set when several items were packed into one call
+
+def plan_calls(method, kwargs_list, chunk_size = CHUNK_SIZE):
+    # yields the BulkCalls that answer every item in kwargs_list (any iterable), reading it as it goes
+    # items with a single value for a multi-value parameter are packed into chunks, the rest are called as given
+    # at most one partly filled chunk per multi-value parameter is held back at a time
+    params = MULTI_VALUE_PARAMS.get(method, dict())
+    packed = dict() # (multi-value parameter, field) -> items of the chunk being filled
+
+    for kwargs in kwargs_list:
+        if len(kwargs) == 1 and list(kwargs.keys())[0] in params and ',' not in str(list(kwargs.values())[0]):
+            param = params[list(kwargs.keys())[0]]
+            chunk = packed.setdefault(param, [])
+            chunk.append(kwargs)
+
+            if len(chunk) >= chunk_size:
+                yield packed_call(method, param, packed.pop(param))
+        else:
+            yield BulkCall(method, kwargs, [kwargs])
+
+    for (param, chunk) in packed.items():
+        yield packed_call(method, param, chunk)
+
+def packed_call(method, param, chunk):
+    # one multi-value call for a chunk of single-value items
+    (multi_param, field) = param
+    values = ','.join([str(list(item.values())[0]) for item in chunk])
+
+    return BulkCall(method, {multi_param: values}, chunk, field)
+
+def split_response(call, response):
+    # returns [(item, response for that item alone, or None if the response didn't mention it)]
+    if call.field is None:
+        return [(call.items[0], response)]
+
+    entries = dict()
+
+    for entry in response['data'].get('balances', []):
+        entries[str(entry.get(call.field))] = entry
+
+    results = []
+
+    for item in call.items:
+        entry = entries.get(str(list(item.values())[0]))
+
+        if entry is None:
+            results.append((item, None))
+            continue
+
+        # shaped like the response to a call for this item alone
+        data = {'network': response['data'].get('network'),
+                'available_balance': entry.get('available_balance'),
+                'pending_received_balance': entry.get('pending_received_balance'),
+                'balances': [entry]}
+
+        results.append((item, {'status': response['status'], 'data': data}))
+
+    return results
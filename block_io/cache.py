@@ -0,0 +1,222 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+
+class TTLCache(object):
+    # bounded, thread-safe LRU mapping whose entries expire ttl seconds after being set
+    # on_evict(key, value) is called whenever an entry leaves the cache for any reason
+
+    def __init__(self, max_size = 128, ttl = None, on_evict = None, clock = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl # None means entries never expire
+        self.on_evict = on_evict
+        self.clock = clock
+        self.entries = OrderedDict() # key -> (expires_at, value)
+        self.lock = threading.RLock()
+
+    def get(self, key, default = None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+
+            expires_at, value = self.entries[key]
+
+            if expires_at is not None and self.clock() >= expires_at:
+                self.evict(key)
+                return default
+
+            # most recently used goes to the end
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl = None):
+        with self.lock:
+            if key in self.entries:
+                self.evict(key)
+
+            ttl = self.ttl if ttl is None else ttl
+            self.entries[key] = (None if ttl is None else self.clock() + ttl, value)
+
+            while len(self.entries) > self.max_size:
+                # least recently used is at the front
+                self.evict(next(iter(self.entries)))
+
+    def pop(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.evict(key)
+
+    def evict(self, key):
+        expires_at, value = self.entries.pop(key)
+
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries.keys()):
+                self.evict(key)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+class CachedKey(object):
+    # a decrypted signer key held by KeyCache
+
+    def __init__(self, private_key):
+        self.private_key = private_key # bitcoinutils.keys.PrivateKey
+
+    def wipe(self):
+        # drops our reference to the key object, nothing is zeroed:
+        # the secret lives in the key's integers, which Python can't overwrite, and is freed once nothing else refers to it
+        self.private_key = None
+
+class KeyCache(TTLCache):
+    # opt-in cache of signer keys decrypted by BlockIo.Helper.dynamicExtractKey
+    # entries are keyed on the user_key's public key, encrypted passphrase, algorithm, and the PIN used
+    # every evicted key is dropped (see CachedKey.wipe), then on_wipe(public_key) is called
+
+    def __init__(self, max_size = 16, ttl = 300, on_wipe = None, clock = time.monotonic):
+        self.on_wipe = on_wipe
+        super().__init__(max_size, ttl, self.wipe_entry, clock)
+
+    @staticmethod
+    def cache_key(user_key, pin):
+        algorithm = json.dumps(user_key.get('algorithm'), sort_keys = True)
+        # PINs may be str or bytes, as everywhere else
+        pin_digest = sha256(pin.encode('utf-8') if isinstance(pin, str) else pin).hexdigest()
+
+        return (user_key['public_key'], user_key['encrypted_passphrase'], algorithm, pin_digest)
+
+    def get_key(self, user_key, pin):
+        # returns the cached PrivateKey, or None
+        entry = self.get(self.cache_key(user_key, pin))
+        return None if entry is None else entry.private_key
+
+    def set_key(self, user_key, pin, private_key):
+        self.set(self.cache_key(user_key, pin), CachedKey(private_key))
+
+    def wipe_entry(self, key, entry):
+        entry.wipe()
+
+        if self.on_wipe is not None:
+            self.on_wipe(key[0])
+
+# read methods ResponseCache serves by default, with how many seconds each response stays fresh
+# prepare_* responses are never cached, they have to reflect the account as it is right now
+DEFAULT_METHOD_TTLS = {
+    'get_balance': 10,
+    'get_address_balance': 10,
+    'get_address_by_label': 60,
+    'get_my_addresses': 60,
+    'get_my_addresses_without_balances': 60,
+    'get_network_fee_estimate': 30,
+    'get_current_price': 60,
+    'is_valid_address': 3600,
+    'get_raw_transaction': 3600,
+    'get_dtrust_address_balance': 10,
+    'get_dtrust_address_by_label': 60,
+    'get_my_dtrust_addresses': 60,
+    'get_account_info': 300
+}
+
+# calls that never change account state, so they don't invalidate anything
+NON_MUTATING_METHODS = frozenset([
+    'get_transactions',
+    'get_dtrust_transactions',
+    'prepare_transaction',
+    'prepare_dtrust_transaction',
+    'prepare_sweep_transaction'
+])
+
+class ResponseCache(TTLCache):
+    # opt-in cache of API responses, for the methods in method_ttls ({method: ttl seconds}) only
+    # entries are keyed on the API key, the method, and its arguments
+    # any other call (withdraw, submit_transaction, get_new_address, ...) drops every entry for its API key,
+    # unless it is listed in non_mutating_methods
+
+    def __init__(self, max_size = 1024, method_ttls = DEFAULT_METHOD_TTLS, non_mutating_methods = NON_MUTATING_METHODS, clock = time.monotonic):
+        super().__init__(max_size, None, None, clock)
+        self.method_ttls = dict(method_ttls)
+        self.non_mutating_methods = frozenset(non_mutating_methods)
+        self.generations = dict() # api_key -> number of invalidations so far
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(api_key, method, kwargs):
+        return (api_key, method, json.dumps(kwargs, sort_keys = True, default = str))
+
+    def invalidates(self, method):
+        return method not in self.method_ttls and method not in self.non_mutating_methods
+
+    def invalidate(self, api_key):
+        with self.lock:
+            # a response already in flight must not be stored once we're done here
+            self.generations[api_key] = self.generations.get(api_key, 0) + 1
+
+            for key in [key for key in self.entries.keys() if key[0] == api_key]:
+                self.evict(key)
+
+    def lookup(self, api_key, method, kwargs):
+        # returns (cache key, generation, cached response or None)
+        key = self.cache_key(api_key, method, kwargs)
+
+        with self.lock:
+            response = self.get(key)
+
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            return (key, self.generations.get(api_key, 0), response)
+
+    def store(self, key, generation, response):
+        with self.lock:
+            if self.generations.get(key[0], 0) == generation:
+                self.set(key, copy.deepcopy(response), self.method_ttls[key[1]])
+
+    def call(self, api_key, method, kwargs, send):
+        # send() makes the call and returns the response or raises
+        if method not in self.method_ttls:
+            try:
+                return send()
+            finally:
+                # even a failed write may have gone through
+                if self.invalidates(method):
+                    self.invalidate(api_key)
+
+        key, generation, response = self.lookup(api_key, method, kwargs)
+
+        if response is not None:
+            # callers get their own copy, so nobody can change what's cached
+            return copy.deepcopy(response)
+
+        response = send()
+        self.store(key, generation, response)
+
+        return response
+
+    async def acall(self, api_key, method, kwargs, send):
+        # asyncio version of call(), send() returns an awaitable
+        if method not in self.method_ttls:
+            try:
+                return await send()
+            finally:
+                if self.invalidates(method):
+                    self.invalidate(api_key)
+
+        key, generation, response = self.lookup(api_key, method, kwargs)
+
+        if response is not None:
+            return copy.deepcopy(response)
+
+        response = await send()
+        self.store(key, generation, response)
+
+        return response
@@ -0,0 +1,41 @@
+import json
+
+# decodes API responses, which are JSON with every amount as a string
+# prepared transactions with hundreds of inputs run to a few hundred KB, so a faster parser pays off
+
+json_decoder = None
+
+def get_json_decoder():
+    # the function BlockIo decodes responses with, picked on first use: orjson.loads if orjson is installed, else json.loads
+    global json_decoder
+
+    if json_decoder is None:
+        try:
+            import orjson
+            json_decoder = orjson.loads
+        except ImportError:
+            json_decoder = json.loads
+
+    return json_decoder
+
+def set_json_decoder(decoder):
+    # decoder is 'json', 'orjson', or any function taking bytes and returning the decoded object
+    global json_decoder
+
+    if decoder == 'json':
+        decoder = json.loads
+    elif decoder == 'orjson':
+        import orjson
+        decoder = orjson.loads
+
+    json_decoder = decoder
+
+def decode_response(response):
+    # the decoded body of a transport's response
+    # responses without a raw body (content) decode themselves
+    content = getattr(response, 'content', None)
+
+    if isinstance(content, (bytes, str)):
+        return get_json_decoder()(content)
+
+    return response.json()
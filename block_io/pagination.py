@@ -0,0 +1,124 @@
+class PageIterator(object):
+    # yields the records of a paged API call one at a time, fetching the next page in the background
+    # only the current and the next page are held in memory
+    #
+    # checkpoint is the position after the last record the caller finished with (the one before the record
+    # it asked for most recently), pass it back as checkpoint= to resume from there
+    # a caller that stops in the middle of a record gets that record again on resume
+    #
+    # works with BlockIo (for ...) and AsyncBlockIo (async for ...)
+
+    records_key = None
+
+    def __init__(self, blockio, method, kwargs, checkpoint = None, prefetch = True):
+        self.blockio = blockio
+        self.method = method
+        self.kwargs = kwargs
+        self.checkpoint = checkpoint
+        self.prefetch = prefetch
+
+    def start(self):
+        # (params for the first page, records to skip on it)
+        raise NotImplementedError
+
+    def next_page(self, params, records):
+        # params for the page after this one
+        raise NotImplementedError
+
+    def position(self, params, records, index):
+        # the checkpoint after records[index]
+        raise NotImplementedError
+
+    def fetch(self, params):
+        kwargs = dict(self.kwargs)
+        kwargs.update(params)
+        return self.blockio.api_call(self.method, **kwargs)
+
+    def records(self, response):
+        return response['data'][self.records_key]
+
+    def __iter__(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        params, skip = self.start()
+        executor = ThreadPoolExecutor(max_workers = 1) if self.prefetch else None
+
+        try:
+            records = self.records(self.fetch(params))
+
+            while len(records) > 0:
+                next_params = self.next_page(params, records)
+                next_page = executor.submit(self.fetch, next_params) if executor is not None else None
+
+                for index in range(skip, len(records)):
+                    yield records[index]
+                    self.checkpoint = self.position(params, records, index)
+
+                params, skip = next_params, 0
+                records = self.records(next_page.result() if next_page is not None else self.fetch(next_params))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait = False)
+
+    def __aiter__(self):
+        return self.aiterate()
+
+    async def aiterate(self):
+        import asyncio
+
+        params, skip = self.start()
+        next_page = None
+
+        try:
+            records = self.records(await self.fetch(params))
+
+            while len(records) > 0:
+                next_params = self.next_page(params, records)
+                next_page = asyncio.ensure_future(self.fetch(next_params)) if self.prefetch else None
+
+                for index in range(skip, len(records)):
+                    yield records[index]
+                    self.checkpoint = self.position(params, records, index)
+
+                params, skip = next_params, 0
+                records = self.records(await next_page if next_page is not None else await self.fetch(next_params))
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+class TransactionIterator(PageIterator):
+    # get_transactions and get_dtrust_transactions: newest first, each page continues before_tx the last txid
+    # the checkpoint is {'before_tx': txid}
+
+    records_key = 'txs'
+
+    def start(self):
+        return (dict(self.checkpoint or self.initial_params()), 0)
+
+    def initial_params(self):
+        return {'before_tx': self.kwargs['before_tx']} if 'before_tx' in self.kwargs else dict()
+
+    def next_page(self, params, records):
+        return {'before_tx': records[-1]['txid']}
+
+    def position(self, params, records, index):
+        return {'before_tx': records[index]['txid']}
+
+class AddressIterator(PageIterator):
+    # get_my_addresses and friends: numbered pages, starting at 1
+    # the checkpoint is {'page': page, 'offset': records done on that page}
+
+    records_key = 'addresses'
+
+    def start(self):
+        if self.checkpoint is not None:
+            return ({'page': self.checkpoint['page']}, self.checkpoint['offset'])
+
+        return ({'page': self.kwargs.get('page', 1)}, 0)
+
+    def next_page(self, params, records):
+        return {'page': int(params['page']) + 1}
+
+    def position(self, params, records, index):
+        return {'page': params['page'], 'offset': index + 1}
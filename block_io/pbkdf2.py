@@ -6,12 +6,32 @@
 import base64
 import sys
 import hmac
+import hashlib
 from binascii import hexlify, unhexlify
 from struct import pack
 from hashlib import sha256
 
 def pbkdf2( password, keylen, salt = "", itercount = 1024, hashfn = sha256 ):
+    # uses the native (OpenSSL) pbkdf2 when available, falls back to pbkdf2_python
+    # both produce identical output
+
+    try:
+        return pbkdf2_native( password, keylen, salt, itercount, hashfn )
+    except (ValueError, TypeError, AttributeError):
+        # unsupported hash function, or parameters hashlib won't accept (e.g. zero iterations)
+        return pbkdf2_python( password, keylen, salt, itercount, hashfn )
+
+def pbkdf2_native( password, keylen, salt = "", itercount = 1024, hashfn = sha256 ):
+    # hashlib.pbkdf2_hmac does every round in C
+
+    if type(password) is not bytes:
+        password = password.encode('utf-8')
+
+    return hashlib.pbkdf2_hmac( hashfn().name, password, salt.encode('utf-8'), itercount, keylen )
+
+def pbkdf2_python( password, keylen, salt = "", itercount = 1024, hashfn = sha256 ):
     # native pbkdf2, no external libs
+    # kept as the reference implementation
 
     try:
         # depending whether the hashfn is from hashlib or sha/md5
@@ -36,17 +56,14 @@ def pbkdf2( password, keylen, salt = "", itercount = 1024, hashfn = sha256 ):
 
 def xorbytes( a, b ):
     if len(a) != len(b):
-        raise "xorstr(): lengths differ"
-
-    ret = b''
-    for i in range(len(a)):
-        ret += bytes([a[i] ^ b[i]])
+        raise ValueError("xorbytes(): lengths differ")
 
-    return ret
+    # xor whole blocks as integers instead of byte by byte
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
 
 def xorstr( a, b ):
     if len(a) != len(b):
-        raise "xorstr(): lengths differ"
+        raise ValueError("xorstr(): lengths differ")
     ret = ''
     for i in range(len(a)):
         ret += chr(ord(a[i]) ^ ord(b[i]))
@@ -61,13 +78,12 @@ def prf( h, data ):
 # password, it will be copy()ed and not modified.
 def pbkdf2_F( h, salt, itercount, blocknum ):
     U = prf( h, salt + pack('>i',blocknum ) )
-    T = U
 
-    xor_func = xorbytes
+    # accumulate the xor as an integer, convert back to bytes once
+    T = int.from_bytes( U, 'big' )
 
     for i in range(2, itercount+1):
         U = prf( h, U )
-        T = xor_func( T, U )
-
-    return T
+        T ^= int.from_bytes( U, 'big' )
 
+    return T.to_bytes( len(U), 'big' )
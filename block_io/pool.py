@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from . import BlockIo
+from .transport import HttpTransport
+
+class BlockIoPool(object):
+    # several API keys (one per network, e.g. BTC, LTC, DOGE) behind one object
+    # every client shares one pooled transport, and gets its own RetryPolicy
+    # a shared rate_limiter keeps a separate bucket for each API key
+    #
+    #   pool = BlockIoPool({'BTC': 'BTC API KEY', 'LTC': ('LTC API KEY', 'SECRET PIN')})
+    #   pool['BTC'].get_balance()
+    #   pool.call('LTC', 'get_balance')
+    #   pool.fan_out('get_balance') # {'BTC': ..., 'LTC': ...}
+
+    def __init__(self, keys = None, version = 2, transport = None, pool_size = 10, timeout = None, keep_alive = True, **options):
+        # keys maps a network name to its API key, or to (API key, PIN)
+        # options (key_cache, rate_limiter, response_cache, ...) are passed to every client
+        self.version = version
+        self.options = options
+        self.clients = dict()
+
+        # one connection pool for every key, they all talk to the same host
+        self.owns_transport = transport is None
+
+        if transport is None:
+            transport = HttpTransport(pool_maxsize = pool_size, timeout = timeout, keep_alive = keep_alive)
+
+        self.transport = transport
+
+        for (network, key) in (keys or dict()).items():
+            if isinstance(key, (tuple, list)):
+                self.add(network, *key)
+            else:
+                self.add(network, key)
+
+    def add(self, network, api_key, pin = None, **options):
+        # options given here override the pool's options for this client only
+        client_options = dict(self.options)
+        client_options.update(options)
+
+        self.clients[network] = BlockIo(api_key, pin, self.version, transport = self.transport, **client_options)
+
+        return self.clients[network]
+
+    def client(self, network):
+        if network not in self.clients:
+            raise KeyError("No API key for network %s" % network)
+
+        return self.clients[network]
+
+    def __getitem__(self, network):
+        return self.client(network)
+
+    def __contains__(self, network):
+        return network in self.clients
+
+    def networks(self):
+        return list(self.clients.keys())
+
+    def call(self, network, method, **kwargs):
+        # an API call with the given network's key
+        return getattr(self.client(network), method)(**kwargs)
+
+    def fan_out(self, method, networks = None, **kwargs):
+        # the same call on every network (or the given ones) at once
+        # returns {network: response, or the exception it raised}
+        networks = self.networks() if networks is None else list(networks)
+
+        if len(networks) == 0:
+            return dict()
+
+        def run(network):
+            try:
+                return self.call(network, method, **kwargs)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers = len(networks)) as executor:
+            return dict(zip(networks, executor.map(run, networks)))
+
+    def close(self):
+        # close every client, which drops its saved sweep keys, then release pooled connections, if we own them
+        for client in self.clients.values():
+            client.close()
+
+        if self.owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
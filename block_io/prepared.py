@@ -0,0 +1,97 @@
+# a compact, typed view of a prepare_*_transaction response, built once and then used for signing
+# amounts are integer satoshis
+
+SEGWIT_ADDRESS_TYPES = frozenset(['P2WSH-over-P2SH', 'P2WPKH-over-P2SH', 'P2WPKH', 'WITNESS_V0'])
+
+def to_satoshis(value):
+    # exact conversion of an amount string with up to 8 decimal places, e.g. '0.00188899' -> 188899
+    whole, dot, fraction = value.partition('.')
+
+    if (not (whole.isdigit() and (fraction.isdigit() or (dot == '' and fraction == ''))) or len(fraction) > 8):
+        raise ValueError("Invalid amount %s" % value)
+
+    return int(whole) * 100000000 + int(fraction.ljust(8, '0'))
+
+def format_satoshis(value):
+    # the API's amount string for a number of satoshis, e.g. 188899 -> '0.00188899'
+    sign = '-' if value < 0 else ''
+    whole, fraction = divmod(abs(value), 100000000)
+
+    return '%s%d.%08d' % (sign, whole, fraction)
+
+class AddressData(object):
+    # an address whose coins the transaction spends
+
+    __slots__ = ('address', 'address_type', 'public_keys', 'required_signatures', 'is_segwit')
+
+    def __init__(self, address, address_type, public_keys, required_signatures):
+        self.address = address
+        self.address_type = address_type
+        self.public_keys = tuple(public_keys) # in redeem script order
+        self.required_signatures = required_signatures
+        self.is_segwit = address_type in SEGWIT_ADDRESS_TYPES
+
+class PreparedInput(object):
+
+    __slots__ = ('input_index', 'previous_txid', 'previous_output_index', 'value', 'spending_address', 'address_data')
+
+    def __init__(self, input_index, previous_txid, previous_output_index, value, spending_address, address_data):
+        self.input_index = input_index
+        self.previous_txid = previous_txid
+        self.previous_output_index = previous_output_index
+        self.value = value # satoshis
+        self.spending_address = spending_address
+        self.address_data = address_data # the spending address's AddressData
+
+class PreparedOutput(object):
+
+    __slots__ = ('output_index', 'category', 'value', 'receiving_address')
+
+    def __init__(self, output_index, category, value, receiving_address):
+        self.output_index = output_index
+        self.category = category # 'user-specified', 'change' or 'blockio-fee'
+        self.value = value # satoshis
+        self.receiving_address = receiving_address
+
+class PreparedTransaction(object):
+
+    __slots__ = ('network', 'tx_type', 'inputs', 'outputs', 'address_data', 'user_key', 'expected_unsigned_txid', 'has_segwit_inputs')
+
+    def __init__(self, network, tx_type, inputs, outputs, address_data, user_key = None, expected_unsigned_txid = None):
+        self.network = network
+        self.tx_type = tx_type
+        self.inputs = inputs
+        self.outputs = outputs
+        self.address_data = address_data # address -> AddressData
+        self.user_key = user_key # the encrypted signer key, as Block.io sent it
+        self.expected_unsigned_txid = expected_unsigned_txid
+        self.has_segwit_inputs = any(cur_input.address_data.is_segwit for cur_input in inputs)
+
+    @classmethod
+    def from_response(cls, prepare_data):
+        # builds the model from the decoded response
+        data = prepare_data['data']
+        address_data = dict()
+
+        for cur_address_data in data['input_address_data']:
+            address_data[cur_address_data['address']] = AddressData(cur_address_data['address'], cur_address_data['address_type'],
+                                                                    cur_address_data['public_keys'], cur_address_data['required_signatures'])
+
+        inputs = [PreparedInput(cur_input['input_index'], cur_input['previous_txid'], cur_input['previous_output_index'],
+                                to_satoshis(cur_input['input_value']), cur_input['spending_address'], address_data[cur_input['spending_address']])
+                  for cur_input in data['inputs']]
+
+        outputs = [PreparedOutput(cur_output.get('output_index'), cur_output['output_category'],
+                                  to_satoshis(cur_output['output_value']), cur_output['receiving_address'])
+                   for cur_output in data['outputs']]
+
+        return cls(data['network'], data['tx_type'], inputs, outputs, address_data,
+                   data.get('user_key'), data.get('expected_unsigned_txid'))
+
+    @classmethod
+    def load(cls, prepare_data):
+        # prepare_data is the decoded response, or a PreparedTransaction already
+        if isinstance(prepare_data, cls):
+            return prepare_data
+
+        return cls.from_response(prepare_data)
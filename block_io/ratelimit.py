@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from hashlib import sha256
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # not on Windows
+
+class TokenBucket(object):
+    # in-process token bucket, shared by every thread that holds it
+    # rate tokens are added per second, up to capacity
+
+    def __init__(self, rate, capacity = None, clock = time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens = 1):
+        # takes the tokens now, returns how many seconds the caller must wait before using them
+        with self.lock:
+            self.tokens, self.updated, wait = take_tokens(self.tokens, self.updated, self.clock(), self.rate, self.capacity, tokens)
+            return wait
+
+class FileTokenBucket(object):
+    # token bucket shared by every process on this host that uses the same path
+    # the state is a small JSON file, updated under an exclusive flock
+
+    def __init__(self, path, rate, capacity = None, clock = time.time):
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl, which this platform does not have.")
+
+        self.path = path
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock # wall clock, since it is compared across processes
+        self.lock = threading.Lock() # flock doesn't exclude threads sharing the file descriptor
+
+    def reserve(self, tokens = 1):
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+                try:
+                    state = json.loads(os.read(fd, 4096).decode('utf-8'))
+                except ValueError:
+                    # new (or unreadable) file, start full
+                    state = {"tokens": self.capacity, "updated": self.clock()}
+
+                state["tokens"], state["updated"], wait = take_tokens(state["tokens"], state["updated"], self.clock(), self.rate, self.capacity, tokens)
+
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, json.dumps(state).encode('utf-8'))
+
+                return wait
+            finally:
+                # closing releases the flock
+                os.close(fd)
+
+def take_tokens(available, updated, now, rate, capacity, tokens):
+    # refill, then take; available goes negative when callers have to wait
+    # returns (available, updated, seconds to wait)
+    available = min(capacity, available + max(0.0, now - updated) * rate)
+    available -= tokens
+    wait = 0.0 if available >= 0 else -available / rate
+
+    return (available, now, wait)
+
+class RateLimiter(object):
+    # client-side rate limit every api_call passes through
+    # one bucket per API key, plus one per method for methods listed in method_rates ({method: (rate, capacity)})
+    # with shared_directory set, buckets are files in that directory, shared by every process that uses it
+
+    def __init__(self, rate, capacity = None, method_rates = None, shared_directory = None, sleep = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.method_rates = method_rates if method_rates is not None else dict()
+        self.shared_directory = shared_directory
+        self.sleep = sleep
+        self.buckets = dict()
+        self.lock = threading.Lock()
+
+    def bucket(self, api_key, method):
+        # method is None for the API key's own bucket
+        with self.lock:
+            if (api_key, method) not in self.buckets:
+                rate, capacity = (self.rate, self.capacity) if method is None else self.method_rates[method]
+
+                if self.shared_directory is None:
+                    bucket = TokenBucket(rate, capacity)
+                else:
+                    # never put the API key itself in a file name
+                    name = sha256((api_key or "").encode('utf-8')).hexdigest()[:32] + ("" if method is None else "." + method)
+                    bucket = FileTokenBucket(os.path.join(self.shared_directory, "block_io_ratelimit." + name), rate, capacity)
+
+                self.buckets[(api_key, method)] = bucket
+
+            return self.buckets[(api_key, method)]
+
+    def reserve(self, api_key, method):
+        wait = self.bucket(api_key, None).reserve()
+
+        if method in self.method_rates:
+            wait = max(wait, self.bucket(api_key, method).reserve())
+
+        return wait
+
+    def acquire(self, api_key, method):
+        # blocks until this call is allowed
+        wait = self.reserve(api_key, method)
+
+        if wait > 0:
+            self.sleep(wait)
+
+    async def aacquire(self, api_key, method):
+        wait = self.reserve(api_key, method)
+
+        if wait > 0:
+            await asyncio.sleep(wait)
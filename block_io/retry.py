@@ -0,0 +1,138 @@
+import random
+import time
+
+# read-only API methods, safe to send again if Block.io throttled us or failed internally
+# methods that move coins or create things (withdraw, submit_transaction, get_new_address, ...) are never retried unless listed explicitly
+READ_ONLY_METHODS = frozenset([
+    'get_balance',
+    'get_my_addresses',
+    'get_my_addresses_without_balances',
+    'get_address_balance',
+    'get_address_by_label',
+    'get_transactions',
+    'get_raw_transaction',
+    'get_network_fee_estimate',
+    'get_current_price',
+    'is_valid_address',
+    'get_dtrust_address_balance',
+    'get_my_dtrust_addresses',
+    'get_dtrust_address_by_label',
+    'get_dtrust_transactions',
+    'get_account_info',
+    'prepare_transaction',
+    'prepare_dtrust_transaction',
+    'prepare_sweep_transaction'
+])
+
+class RetryPolicy(object):
+    # retries throttled (HTTP 419-420) and failed (HTTP 5xx) calls with exponential backoff and full jitter
+    # a Retry-After header sets the minimum wait, and no call waits past max_elapsed seconds in total
+    # metrics(method, retries, backoff_seconds) is called once per API call, however it ended
+    # RetryPolicy(max_retries = 0) turns retries off
+
+    def __init__(self, max_retries = 3, backoff_factor = 0.5, max_backoff = 30, max_elapsed = 60,
+                 retry_methods = READ_ONLY_METHODS, metrics = None, clock = time.monotonic, sleep = time.sleep, jitter = random.uniform):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_elapsed = max_elapsed
+        self.retry_methods = frozenset(retry_methods)
+        self.metrics = metrics
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def is_retryable(self, method, error):
+        # throttled or failed at Block.io, by the exception or by the HTTP status it came with,
+        # since a gateway's HTML 503 or a 420 with a 'fail' body raise other exceptions
+        from . import BlockIoAPIThrottleError, BlockIoAPIInternalError
+
+        if method not in self.retry_methods:
+            return False
+
+        if isinstance(error, (BlockIoAPIThrottleError, BlockIoAPIInternalError)):
+            return True
+
+        status_code = getattr(error, 'status_code', None)
+        return status_code is not None and (419 <= status_code <= 420 or 500 <= status_code <= 599)
+
+    def next_delay(self, method, error, retries, started):
+        # seconds to wait before the next attempt, or None to give up
+        if retries >= self.max_retries or not self.is_retryable(method, error):
+            return None
+
+        delay = self.jitter(0, min(self.max_backoff, self.backoff_factor * (2 ** retries)))
+        retry_after = getattr(error, 'retry_after', None)
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if self.clock() - started + delay > self.max_elapsed:
+            return None
+
+        return delay
+
+    def call(self, method, send):
+        # send() makes one attempt and returns the response or raises
+        started = self.clock()
+        retries = 0
+        backoff = 0.0
+
+        try:
+            while True:
+                try:
+                    return send()
+                except Exception as e:
+                    delay = self.next_delay(method, e, retries, started)
+
+                    if delay is None:
+                        raise
+
+                    self.sleep(delay)
+                    retries += 1
+                    backoff += delay
+        finally:
+            if self.metrics is not None:
+                self.metrics(method, retries, backoff)
+
+    async def acall(self, method, send):
+        # asyncio version of call(), send() returns an awaitable
+        import asyncio
+
+        started = self.clock()
+        retries = 0
+        backoff = 0.0
+
+        try:
+            while True:
+                try:
+                    return await send()
+                except Exception as e:
+                    delay = self.next_delay(method, e, retries, started)
+
+                    if delay is None:
+                        raise
+
+                    await asyncio.sleep(delay)
+                    retries += 1
+                    backoff += delay
+        finally:
+            if self.metrics is not None:
+                self.metrics(method, retries, backoff)
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date, returns seconds or None
+    import email.utils
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,88 @@
+import functools
+from hashlib import sha256
+
+# bounded LRU caches for the scripts create_and_sign_transaction builds over and over
+# consolidations spend hundreds of UTXOs on a few addresses, so most lookups are hits
+# nothing here reads the process-global bitcoinutils network, results that depend on the network are keyed by it
+# cached Script objects are shared, never modify them
+# bitcoinutils is imported on first use, it is slow to import
+
+CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def output_script(address, network):
+    # scriptPubKey for an address (base58 or bech32 decode, checksum)
+    from .bitcoinutils_patches import get_output_script
+    return get_output_script(address, network)
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def redeem_script(required_signatures, public_keys):
+    # multisig redeem script for the ordered public_keys (a tuple)
+    from .bitcoinutils_patches import Script
+
+    script_elements = []
+    script_elements.append('OP_' + str(required_signatures))
+
+    for public_key in public_keys:
+        script_elements.append(public_key)
+
+    script_elements.append('OP_' + str(len(public_keys)))
+    script_elements.append('OP_CHECKMULTISIG')
+
+    return Script(script_elements)
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def p2wsh_program(required_signatures, public_keys):
+    # the P2WSH output script (hex) that a P2WSH-over-P2SH scriptSig pushes
+    from .bitcoinutils_patches import Script
+    witness_script_hash = sha256(redeem_script(required_signatures, public_keys).to_bytes()).hexdigest()
+    return Script(['OP_0', witness_script_hash]).to_hex()
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def redeem_script_bytes(required_signatures, public_keys):
+    # the multisig redeem script as bytes, for scriptSigs and witnesses assembled with block_io.serialize
+    return redeem_script(required_signatures, public_keys).to_bytes()
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def p2wsh_script_sig(required_signatures, public_keys):
+    # the scriptSig of a P2WSH-over-P2SH input, a push of the P2WSH program
+    from .serialize import RawScript, push_data
+    program = b'\x00\x20' + sha256(redeem_script_bytes(required_signatures, public_keys)).digest()
+    return RawScript([program], push_data(program))
+
+@functools.lru_cache(maxsize = CACHE_SIZE)
+def public_key_hash(public_key):
+    # hash160 (hex) of a compressed public key
+    from .bitcoinutils_patches import PublicKey
+    return PublicKey(public_key).to_hash160()
+
+def p2pkh_script(public_key):
+    # the P2PKH scriptPubKey that single-key inputs sign
+    from .bitcoinutils_patches import Script
+    return Script(['OP_DUP', 'OP_HASH160', public_key_hash(public_key), 'OP_EQUALVERIFY', 'OP_CHECKSIG'])
+
+def p2wpkh_program(public_key):
+    # the P2WPKH output script (hex) that a P2WPKH-over-P2SH scriptSig pushes
+    from .bitcoinutils_patches import Script
+    return Script(['OP_0', public_key_hash(public_key)]).to_hex()
+
+caches = [output_script, redeem_script, p2wsh_program, redeem_script_bytes, p2wsh_script_sig, public_key_hash]
+
+def cache_stats():
+    # hits, misses and size for each cache, keyed by name
+    stats = dict()
+
+    for cache in caches:
+        info = cache.cache_info()
+        lookups = info.hits + info.misses
+        stats[cache.__name__] = {"hits": info.hits,
+                                 "misses": info.misses,
+                                 "size": info.currsize,
+                                 "max_size": info.maxsize,
+                                 "hit_rate": (info.hits / lookups) if lookups > 0 else 0.0}
+
+    return stats
+
+def clear_caches():
+    for cache in caches:
+        cache.cache_clear()
@@ -0,0 +1,106 @@
+# byte-level transaction serialization, the same bytes as bitcoinutils' Transaction.stream()
+# Transaction.stream grows one bytes object with += for every input, output and witness,
+# which copies the transaction so far each time and is quadratic in the number of inputs
+# here each piece is produced once, the result is sized and filled once, and hex conversion happens once at the end
+# bitcoinutils is imported on first use, it is slow to import
+
+def write_transaction(tx, write, has_segwit = None):
+    # calls write(bytes) for each piece of the serialized transaction, in order
+    # write can be a list's append, a file's write or a socket's sendall, so huge transactions can be streamed
+    # has_segwit defaults to the transaction's own, as in Transaction.serialize()
+    from bitcoinutils.utils import encode_var_int
+
+    if has_segwit is None:
+        has_segwit = tx.has_segwit
+
+    write(tx.version)
+
+    if has_segwit and tx.witnesses:
+        # marker and flag
+        write(b'\x00\x01')
+
+    write(encode_var_int(len(tx.inputs)))
+
+    for txin in tx.inputs:
+        write(txin.stream())
+
+    write(encode_var_int(len(tx.outputs)))
+
+    for txout in tx.outputs:
+        write(txout.stream())
+
+    if has_segwit:
+        for witness in tx.witnesses:
+            # witness item count, then the items
+            write(encode_var_int(len(witness.script)))
+            write(witness.to_bytes(True))
+
+    write(tx.locktime)
+
+def stream_transaction(tx, has_segwit = None):
+    # the serialized transaction as bytes
+    pieces = []
+    write_transaction(tx, pieces.append, has_segwit)
+
+    # join sizes the result from the pieces, allocates it once and copies each piece into place
+    return b''.join(pieces)
+
+def serialize_transaction(tx, has_segwit = None):
+    # the serialized transaction as hex, same as tx.serialize()
+    return stream_transaction(tx, has_segwit).hex()
+
+def write_transaction_hex(tx, write, has_segwit = None):
+    # streaming version of serialize_transaction: calls write(str) with the hex of each piece
+    # e.g. to write tx_hex straight into a request body or a file without holding the whole hex string
+    write_transaction(tx, lambda piece: write(piece.hex()), has_segwit)
+
+# scriptSigs and witnesses built straight from bytes, for the fully-signed multisig inputs create_and_sign_transaction assembles
+# the same bytes as the equivalent bitcoinutils Script, without parsing hex tokens for every input
+
+class RawScript(object):
+    # stands in for a bitcoinutils Script whose serialized bytes are already known
+    # data is encoded for where the script goes: push opcodes for a scriptSig, compact sizes for a witness
+    # items has one entry per pushed item, write_transaction counts them for a witness
+
+    def __init__(self, items, data):
+        self.script = items
+        self.data = data
+
+    def to_bytes(self, segwit = False):
+        return self.data
+
+    def to_hex(self):
+        return self.data.hex()
+
+def push_data(data):
+    # a scriptSig push of data (bytes), same as Script._op_push_data
+    if len(data) < 0x4c:
+        return bytes([len(data)]) + data
+    elif len(data) < 0xff:
+        return b'\x4c' + bytes([len(data)]) + data # OP_PUSHDATA1
+    elif len(data) < 0xffff:
+        return b'\x4d' + (len(data)).to_bytes(2, byteorder="little") + data # OP_PUSHDATA2
+    elif len(data) < 0xffffffff:
+        return b'\x4e' + (len(data)).to_bytes(4, byteorder="little") + data # OP_PUSHDATA4
+    else:
+        raise ValueError("Data too large. Cannot push into script")
+
+def witness_item(data):
+    # a witness item (bytes) with its compact size length
+    if len(data) <= 0xfc:
+        # signatures and multisig redeem scripts are always this short
+        return bytes([len(data)]) + data
+
+    from bitcoinutils.utils import encode_var_int
+    return encode_var_int(len(data)) + data
+
+def multisig_script_sig(signatures, redeem_script):
+    # OP_0 <signature>... <redeem script> as a P2SH scriptSig
+    # signatures are raw DER with the sighash byte, in public key order; redeem_script is its raw bytes
+    return RawScript([b''] + signatures + [redeem_script],
+                     b''.join([b'\x00'] + [push_data(signature) for signature in signatures] + [push_data(redeem_script)]))
+
+def multisig_witness(signatures, redeem_script):
+    # the same items as a P2WSH witness
+    return RawScript([b''] + signatures + [redeem_script],
+                     b''.join([b'\x00'] + [witness_item(signature) for signature in signatures] + [witness_item(redeem_script)]))
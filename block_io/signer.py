@@ -0,0 +1,244 @@
+# Long-running signer for an isolated host: python -m block_io.signer
+#
+# Reads one JSON request per line and writes one JSON response per line, over stdin/stdout or a Unix socket:
+#
+#   {"id": 1, "prepare_data": {...prepare_*_transaction response...}, "keys": ["hex private key", ...]}
+#   {"id": 1, "result": {...create_and_sign_transaction response...}}
+#   {"id": 1, "error": {"type": "BlockIoUnknownError", "message": "..."}}
+#
+# {"id": ..., "method": "ping"} is answered with {"id": ..., "result": "pong"}
+# keys are optional, and are added to any given with --keys-file
+# the PIN comes from the BLOCK_IO_PIN environment variable or --pin-file, never the command line
+# decrypted keys stay in memory for --key-ttl seconds after they were decrypted
+# requests that arrive together are signed as one batch, across --workers processes
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+
+from . import BlockIo
+from .cache import KeyCache
+from .decoder import get_json_decoder
+
+class Signer(object):
+    # batches requests from any number of connections and signs them on one thread
+    # reply(response) is called once per request, from the signing thread
+
+    def __init__(self, pin, keys = None, key_ttl = 300, workers = None, batch_size = 32, batch_wait = 0.01):
+        self.blockio = BlockIo("", pin, key_cache = KeyCache(ttl = key_ttl))
+        self.keys = list(keys or [])
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait # seconds to wait for more requests once one has arrived
+        self.requests = queue.Queue()
+        self.executor = None
+
+        if workers is not None and workers > 1:
+            # one pool for the life of the signer
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(max_workers = workers)
+
+        self.thread = threading.Thread(target = self.run, daemon = True)
+        self.thread.start()
+
+    def handle(self, line, reply):
+        # parses one request line and queues it
+        try:
+            request = get_json_decoder()(line)
+
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as e:
+            send(reply, {"id": None, "error": {"type": "InvalidRequest", "message": str(e)}})
+            return
+
+        if request.get('method', 'sign') == 'ping':
+            send(reply, {"id": request.get('id'), "result": "pong"})
+        elif request.get('method', 'sign') != 'sign' or 'prepare_data' not in request:
+            send(reply, {"id": request.get('id'), "error": {"type": "InvalidRequest", "message": "Expected a sign request with prepare_data"}})
+        elif not valid_keys(request.get('keys')):
+            send(reply, {"id": request.get('id'), "error": {"type": "InvalidRequest", "message": "keys must be a list of hex private keys"}})
+        else:
+            self.requests.put((request, reply))
+
+    def next_batch(self):
+        # blocks for the first request, then takes whatever else arrives within batch_wait
+        batch = [self.requests.get()]
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.requests.get(timeout = self.batch_wait))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+
+            # None closes the signer, (None, callback) is a flush marker
+            self.sign_batch([item for item in batch if item is not None and item[0] is not None])
+
+            for item in batch:
+                if item is not None and item[0] is None:
+                    item[1]()
+
+            if None in batch:
+                return
+
+    def sign_batch(self, batch):
+        # requests with the same extra keys are signed together
+        # nothing a request or a client does may raise here, or the signing thread dies and every later request hangs
+        groups = dict()
+
+        for (request, reply) in batch:
+            try:
+                groups.setdefault(tuple(request.get('keys') or []), []).append((request, reply))
+            except Exception as e:
+                send(reply, {"id": request.get('id'), "error": {"type": "InvalidRequest", "message": str(e)}})
+
+        for (keys, group) in groups.items():
+            try:
+                results = self.blockio.create_and_sign_transactions([request['prepare_data'] for (request, reply) in group],
+                                                                   self.keys + list(keys), self.executor)
+            except Exception as e:
+                # e.g. a bad key, which fails the whole group
+                results = [e] * len(group)
+
+            for ((request, reply), result) in zip(group, results):
+                if isinstance(result, Exception):
+                    send(reply, {"id": request.get('id'), "error": {"type": type(result).__name__, "message": str(result)}})
+                else:
+                    send(reply, {"id": request.get('id'), "result": result})
+
+    def flush(self):
+        # blocks until every request queued so far has been answered
+        done = threading.Event()
+        self.requests.put((None, done.set))
+        done.wait()
+
+    def close(self):
+        # signs whatever is queued, then stops
+        self.requests.put(None)
+        self.thread.join()
+
+        self.blockio.key_cache.clear()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+def valid_keys(keys):
+    # a request's optional extra keys: a list of hex strings
+    if keys is None:
+        return True
+
+    if not isinstance(keys, list):
+        return False
+
+    for key in keys:
+        try:
+            bytes.fromhex(key)
+        except (TypeError, ValueError):
+            return False
+
+    return True
+
+def send(reply, response):
+    # a client that has gone away (e.g. BrokenPipeError) only loses its own responses
+    try:
+        reply(response)
+    except Exception:
+        pass
+
+def line_writer(stream):
+    # reply function writing JSON lines to a text or binary stream, safe to call from any thread
+    lock = threading.Lock()
+    binary = not hasattr(stream, 'encoding')
+
+    def reply(response):
+        line = json.dumps(response) + "\n"
+
+        with lock:
+            stream.write(line.encode('utf-8') if binary else line)
+            stream.flush()
+
+    return reply
+
+def serve_stream(signer, instream, outstream):
+    # one client on a pair of streams, e.g. stdin and stdout; returns at end of input
+    reply = line_writer(outstream)
+
+    for line in instream:
+        if len(line.strip()) > 0:
+            signer.handle(line, reply)
+
+def serve_unix_socket(signer, path):
+    # any number of clients on a Unix socket only this user can connect to; runs until interrupted
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            serve_stream(signer, self.rfile, self.wfile)
+
+            # answer everything this client sent before its connection closes
+            signer.flush()
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    old_umask = os.umask(0o177)
+
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    server.daemon_threads = True
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+def read_keys(path):
+    # one hex private key per line
+    with open(path) as keys_file:
+        return [line.strip() for line in keys_file if len(line.strip()) > 0 and not line.startswith('#')]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m block_io.signer", description = "Sign prepared Block.io transactions sent as JSON lines.")
+    parser.add_argument('--socket', default = None, help = 'listen on this Unix socket path instead of stdin/stdout')
+    parser.add_argument('--pin-file', default = None, help = 'read the PIN from this file instead of BLOCK_IO_PIN')
+    parser.add_argument('--keys-file', default = None, help = 'hex private keys (one per line) to sign every request with')
+    parser.add_argument('--key-ttl', type = float, default = 300, help = 'seconds a decrypted key is kept in memory')
+    parser.add_argument('--workers', type = int, default = None, help = 'signing processes')
+    parser.add_argument('--batch-size', type = int, default = 32)
+    parser.add_argument('--batch-wait', type = float, default = 0.01, help = 'seconds to wait for more requests to batch')
+    args = parser.parse_args(argv)
+
+    pin = os.environ.get('BLOCK_IO_PIN')
+
+    if args.pin_file is not None:
+        with open(args.pin_file) as pin_file:
+            pin = pin_file.read().strip()
+
+    keys = read_keys(args.keys_file) if args.keys_file is not None else []
+    signer = Signer(pin, keys, args.key_ttl, args.workers, args.batch_size, args.batch_wait)
+
+    try:
+        if args.socket is not None:
+            serve_unix_socket(signer, args.socket)
+        else:
+            serve_stream(signer, sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signer.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from binascii import hexlify
+import hashlib
+
+from . import tracing
+
+class EcdsaBackend(object):
+    # pure-Python signing with the ecdsa package, always available
+
+    name = 'ecdsa'
+
+    def __init__(self):
+        import ecdsa
+        self.ecdsa = ecdsa
+
+    def sign(self, private_key, digest):
+        # returns a deterministic (RFC6979) low R, low S DER signature as hex bytes, without the sighash byte
+        # grinds the nonce with extra entropy (a little-endian counter) until R fits in 32 bytes with its top bit clear
+        counter = 0
+        der_sig = None
+
+        while True:
+            extra_entropy = b""
+            if (counter > 0):
+                extra_entropy = (counter).to_bytes(32, byteorder="little")
+            der_sig = hexlify(private_key.key.sign_digest_deterministic(digest, hashlib.sha256, self.ecdsa.util.sigencode_der_canonize, extra_entropy))
+            if (int(der_sig[6:8],16) == 32 and int(der_sig[8:10],16) < 128):
+                break
+            counter = counter + 1
+
+        if counter > 0:
+            tracing.count('low_r_retries', counter)
+
+        return der_sig
+
+class Secp256k1Backend(object):
+    # native libsecp256k1 signing through coincurve
+    # its RFC6979 nonce function takes the same 32 byte extra entropy, so signatures match EcdsaBackend
+
+    name = 'secp256k1'
+
+    def __init__(self):
+        import coincurve
+        from coincurve._libsecp256k1 import ffi
+
+        self.coincurve = coincurve
+        self.ffi = ffi
+
+    def sign(self, private_key, digest):
+        signing_key = self.coincurve.PrivateKey(private_key.to_bytes())
+        counter = 0
+
+        while True:
+            extra_entropy = self.ffi.NULL
+            if (counter > 0):
+                extra_entropy = self.ffi.new('unsigned char [32]', (counter).to_bytes(32, byteorder="little"))
+            der_sig = signing_key.sign(digest, hasher = None, custom_nonce = (self.ffi.NULL, extra_entropy))
+            if (der_sig[3] == 32 and der_sig[4] < 128):
+                break
+            counter = counter + 1
+
+        if counter > 0:
+            tracing.count('low_r_retries', counter)
+
+        return hexlify(der_sig)
+
+signing_backend = None
+
+def get_signing_backend():
+    # the backend PrivateKey._sign_input uses, picked on first use: secp256k1 if coincurve is installed, else ecdsa
+    global signing_backend
+
+    if signing_backend is None:
+        try:
+            signing_backend = Secp256k1Backend()
+        except ImportError:
+            signing_backend = EcdsaBackend()
+
+    return signing_backend
+
+def set_signing_backend(backend):
+    # backend is 'ecdsa', 'secp256k1', or any object with sign(private_key, digest)
+    global signing_backend
+
+    if backend == 'ecdsa':
+        backend = EcdsaBackend()
+    elif backend == 'secp256k1':
+        backend = Secp256k1Backend()
+
+    signing_backend = backend
+
+def sign_digests(jobs, workers = None, chunk_count = None):
+    # jobs is a list of (bitcoinutils.keys.PrivateKey, digest)
+    # returns the low R DER signatures (hex, as bytes) in the same order
+    # workers is None (sign here), a number of processes, or a concurrent.futures.Executor to reuse
+    # the jobs are sent to the workers in chunk_count chunks, by default a few per worker (or per CPU, for an executor)
+    import os
+    from concurrent.futures import Executor, ProcessPoolExecutor
+
+    if workers is None or (not isinstance(workers, Executor) and (workers <= 1 or len(jobs) <= 1)):
+        return [private_key._sign_input(digest) for (private_key, digest) in jobs]
+
+    # only the raw secrets and digests are sent to the worker processes
+    raw_jobs = [(private_key.to_bytes(), digest) for (private_key, digest) in jobs]
+
+    if chunk_count is None:
+        # a few chunks per worker keeps them busy without paying per-signature IPC
+        chunk_count = 4 * ((os.cpu_count() or 1) if isinstance(workers, Executor) else workers)
+
+    if isinstance(workers, Executor):
+        return sign_in_executor(workers, raw_jobs, chunk_count)
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        return sign_in_executor(executor, raw_jobs, chunk_count)
+
+def sign_in_executor(executor, raw_jobs, chunk_count):
+    chunk_size = max(1, -(-len(raw_jobs) // max(1, chunk_count)))
+    chunks = [raw_jobs[i:i+chunk_size] for i in range(0, len(raw_jobs), chunk_size)]
+
+    signatures = []
+
+    for chunk_signatures in executor.map(sign_raw_digests, chunks):
+        signatures.extend(chunk_signatures)
+
+    return signatures
+
+def sign_raw_digests(raw_jobs):
+    # runs in the worker process
+    # builds each signing key once per chunk, since dTrust inputs share the same few keys
+    from .bitcoinutils_patches import PrivateKey
+
+    private_keys = dict()
+    signatures = []
+
+    for (secret, digest) in raw_jobs:
+        if secret not in private_keys:
+            private_keys[secret] = PrivateKey(secret_exponent=int.from_bytes(secret, byteorder="big"))
+
+        signatures.append(private_keys[secret]._sign_input(digest))
+
+    return signatures
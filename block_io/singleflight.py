@@ -0,0 +1,123 @@
+import asyncio
+import copy
+import threading
+
+from .cache import ResponseCache
+from .retry import READ_ONLY_METHODS
+
+# reads that are safe to share between callers asking the same thing at the same time
+COALESCED_METHODS = frozenset([method for method in READ_ONLY_METHODS if method.startswith('get_') or method.startswith('is_')])
+
+class LeaderCancelled(Exception):
+    # given to coroutines waiting on a call whose caller was cancelled or interrupted, they send the call again
+    pass
+
+def follower_error(error):
+    # each waiting caller raises its own copy, so threads don't all add to one exception's __traceback__
+    try:
+        return copy.copy(error)
+    except Exception:
+        return error
+
+class InFlightCall(object):
+    # a call the first caller is making on behalf of everyone waiting on it
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.abandoned = False # the first caller was interrupted, there is no result to share
+
+class SingleFlight(object):
+    # concurrent identical calls (same API key, method and arguments) share one request
+    # every caller gets its result, or its exception, and the response is copied for all but the first
+    # works for threads (call) and for coroutines on one event loop (acall)
+
+    def __init__(self, methods = COALESCED_METHODS):
+        self.methods = frozenset(methods)
+        self.calls = dict() # key -> InFlightCall
+        self.futures = dict() # key -> asyncio.Future
+        self.lock = threading.Lock()
+
+    def call(self, api_key, method, kwargs, send):
+        # send() makes the call and returns the response or raises
+        if method not in self.methods:
+            return send()
+
+        key = ResponseCache.cache_key(api_key, method, kwargs)
+
+        while True:
+            with self.lock:
+                in_flight = self.calls.get(key)
+                leader = in_flight is None
+
+                if leader:
+                    in_flight = self.calls[key] = InFlightCall()
+
+            if leader:
+                break
+
+            in_flight.done.wait()
+
+            if in_flight.error is not None:
+                raise follower_error(in_flight.error)
+
+            if not in_flight.abandoned:
+                return copy.deepcopy(in_flight.response)
+
+            # the caller making the request was interrupted, not us: make it ourselves (or wait on whoever does)
+
+        try:
+            in_flight.response = send()
+            return in_flight.response
+        except Exception as e:
+            in_flight.error = e
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit and the like belong to the leader's thread only
+            in_flight.abandoned = True
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+            in_flight.done.set()
+
+    async def acall(self, api_key, method, kwargs, send):
+        # asyncio version of call(), send() returns an awaitable
+        if method not in self.methods:
+            return await send()
+
+        key = ResponseCache.cache_key(api_key, method, kwargs)
+
+        while key in self.futures:
+            future = self.futures[key]
+
+            try:
+                # shield it, so one waiter being cancelled doesn't cancel the call for everyone
+                return copy.deepcopy(await asyncio.shield(future))
+            except LeaderCancelled:
+                # the caller making the request was cancelled, not us: make it ourselves (or wait on whoever does)
+                pass
+
+        future = self.futures[key] = asyncio.get_event_loop().create_future()
+
+        try:
+            response = await send()
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.set_exception(LeaderCancelled())
+            future.exception() # marks it retrieved, in case nobody else was waiting
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        except BaseException:
+            # as in call(), only the leader sees KeyboardInterrupt, SystemExit and the like
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        finally:
+            del self.futures[key]
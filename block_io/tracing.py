@@ -0,0 +1,138 @@
+import threading
+import time
+
+# timed spans and counters from the library's hot paths, for whoever wants them
+# nothing is measured until an observer is set, a disabled span costs one function call
+#
+#   span names:    api_call, http_request (tags: method, status_code), json_decode, key_stretch, key_decrypt,
+#                  sighash, sign, serialize
+#   counter names: http_response_bytes, signatures, low_r_retries
+#
+# low_r_retries from signing worker processes (workers > 1) are not reported
+
+observer = None
+
+class Observer(object):
+    # override either method; both are called on whichever thread did the work
+
+    def span(self, name, seconds, tags):
+        pass
+
+    def count(self, name, value, tags):
+        pass
+
+def get_observer():
+    return observer
+
+def set_observer(new_observer):
+    # None turns tracing off
+    global observer
+    observer = new_observer
+
+class Span(object):
+
+    __slots__ = ('observer', 'name', 'tags', 'started')
+
+    def __init__(self, observer, name, tags):
+        self.observer = observer
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        # the caller may add tags it only learns inside the span, like the status code
+        self.started = time.perf_counter()
+        return self.tags
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.tags['error'] = exc_type.__name__
+
+        self.observer.span(self.name, time.perf_counter() - self.started, self.tags)
+
+    def finish(self):
+        self.__exit__(None, None, None)
+
+class NullSpan(object):
+
+    tags = dict() # written to by callers when tracing is off, never read
+
+    def __enter__(self):
+        return self.tags
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def finish(self):
+        pass
+
+NULL_SPAN = NullSpan()
+
+def span(name, **tags):
+    # with span('sign', inputs = 3) as tags: ...
+    current = observer
+    return NULL_SPAN if current is None else Span(current, name, tags)
+
+def start_span(name, **tags):
+    # for spans around code that doesn't fit a with block: span = start_span('sighash') ... span.finish()
+    # a span that is never finished (e.g. on an exception) is not reported
+    started = span(name, **tags)
+    started.__enter__()
+    return started
+
+def count(name, value = 1, **tags):
+    current = observer
+
+    if current is not None:
+        current.count(name, value, tags)
+
+class StatsCollector(Observer):
+    # in-memory totals for every span and counter, keyed by name and tags
+    #
+    #   stats = StatsCollector()
+    #   set_observer(stats)
+    #   ...
+    #   print(stats.dump())
+
+    def __init__(self):
+        self.spans = dict() # key -> [count, total seconds, min seconds, max seconds]
+        self.counters = dict() # key -> total
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, tags):
+        if len(tags) == 0:
+            return name
+
+        return "%s{%s}" % (name, ",".join(["%s=%s" % (tag, tags[tag]) for tag in sorted(tags.keys())]))
+
+    def span(self, name, seconds, tags):
+        key = self.key(name, tags)
+
+        with self.lock:
+            stats = self.spans.get(key)
+
+            if stats is None:
+                self.spans[key] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = min(stats[2], seconds)
+                stats[3] = max(stats[3], seconds)
+
+    def count(self, name, value, tags):
+        key = self.key(name, tags)
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def dump(self):
+        # a JSON-serializable snapshot
+        with self.lock:
+            return {"spans": dict([(key, {"count": stats[0], "total": stats[1], "mean": stats[1] / stats[0], "min": stats[2], "max": stats[3]})
+                                   for (key, stats) in self.spans.items()]),
+                    "counters": dict(self.counters)}
+
+    def reset(self):
+        with self.lock:
+            self.spans = dict()
+            self.counters = dict()
@@ -0,0 +1,26 @@
+class HttpTransport(object):
+    # long-lived, pooled HTTP transport used by BlockIo.api_call
+    # any object with post(url, json, headers) and close() can be used in its place
+
+    def __init__(self, pool_connections = 1, pool_maxsize = 10, pool_block = False, timeout = None, keep_alive = True):
+        # timeout is passed as-is to requests: None, seconds, or a (connect, read) tuple
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections = pool_connections, pool_maxsize = pool_maxsize, pool_block = pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if keep_alive == False:
+            # ask the server to close the connection after each response
+            self.session.headers['Connection'] = 'close'
+
+    def post(self, url, json, headers):
+        # returns the raw response object (status_code, headers, json())
+        return self.session.post(url, json = json, headers = headers, timeout = self.timeout)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,2 @@
+# the package version, read by setup.py as well
+VERSION = '2.0.6'
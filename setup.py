@@ -1,10 +1,14 @@
 from setuptools import setup
+import re
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
+
+with open("block_io/version.py", "r") as fh:
+    version = re.search(r"VERSION = '([^']+)'", fh.read()).group(1)
     
 setup(name='block-io',
-      version='2.0.6',
+      version=version,
       description='The easiest way to integrate Bitcoin, Dogecoin and Litecoin in your applications. Sign up at Block.io for your API key.',
       url='https://github.com/BlockIo/block_io-python',
       author='Atif Nazir',
@@ -20,4 +24,9 @@ setup(name='block-io',
           'base58>=2.1,<2.2',
           'bitcoin-utils-fork-minimal==0.4.11.6'
       ],
+      extras_require={
+          'async': ['aiohttp>=3.7,<4.0'],
+          'secp256k1': ['coincurve>=13.0'],
+          'orjson': ['orjson>=3.0']
+      },
       zip_safe=False)
@@ -0,0 +1,71 @@
+# stand-ins for the HTTP transport, for tests that drive BlockIo without a network
+
+import asyncio
+import threading
+
+class FakeResponse(object):
+    # the parts of a response BlockIo.process_response reads
+    # content is the raw body, data is returned by json() when there is none
+
+    def __init__(self, status_code, data = None, headers = None, content = None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers if headers is not None else {}
+        self.content = content
+
+    def json(self):
+        return self.data
+
+class FakeTransport(object):
+    # records each request as {"url": ..., "json": ..., "headers": ...}
+    # answers with respond(url, json) when given, otherwise with the next of responses
+    # subclasses can override response(url, json) instead
+    # with blocking = True every request waits (up to 5 seconds) for release.set()
+
+    def __init__(self, responses = (), respond = None, blocking = False):
+        self.responses = list(responses)
+        self.respond = respond
+        self.blocking = blocking
+        self.release = threading.Event()
+        self.requests = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def record(self, url, json, headers):
+        with self.lock:
+            self.requests.append({"url": url, "json": json, "headers": headers})
+
+    def response(self, url, json):
+        if self.respond is not None:
+            return self.respond(url, json)
+
+        return self.responses.pop(0)
+
+    def post(self, url, json, headers):
+        self.record(url, json, headers)
+
+        if self.blocking:
+            self.release.wait(5)
+
+        return self.response(url, json)
+
+    def close(self):
+        self.closed = True
+
+class AsyncFakeTransport(FakeTransport):
+    # the same for AsyncBlockIo; every request takes delay seconds
+
+    def __init__(self, responses = (), respond = None, delay = 0):
+        super().__init__(responses, respond)
+        self.delay = delay
+
+    async def post(self, url, json, headers):
+        self.record(url, json, headers)
+
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+
+        return self.response(url, json)
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,57 @@
+from block_io import BlockIo
+
+import copy
+import json
+import os
+import unittest
+from unittest import mock
+
+class TestBatchSigning(unittest.TestCase):
+
+    def setUp(self):
+
+        self.blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2)
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61",
+            "6c1cefdfd9187b36b36c3698c1362642083dcc1941dc76d751481d3aa29ca65"
+        ]
+        self.maxDiff = None
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_batch_results_in_order_with_errors(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_transaction_response.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+        prepare_dtrust_response = self.load_json_file("data/json/prepare_dtrust_transaction_response_p2sh.json")
+        create_and_sign_dtrust_response = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_p2sh_4_of_5_keys.json")
+
+        bad_transaction = copy.deepcopy(prepare_transaction_response)
+        bad_transaction['data']['expected_unsigned_txid'] = 'x'
+
+        with mock.patch.object(BlockIo.Helper, 'dynamicExtractKey', side_effect = BlockIo.Helper.dynamicExtractKey) as extract:
+            results = self.blockio.create_and_sign_transactions([prepare_transaction_response,
+                                                                 bad_transaction,
+                                                                 prepare_dtrust_response,
+                                                                 prepare_transaction_response], keys = self.dtrust_keys)
+
+        self.assertEqual(extract.call_count, 1)
+        self.assertDictEqual(results[0], create_and_sign_transaction_response)
+        self.assertIsInstance(results[1], Exception)
+        self.assertDictEqual(results[2], create_and_sign_dtrust_response)
+        self.assertDictEqual(results[3], create_and_sign_transaction_response)
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
+    def test_batch_with_workers(self):
+        prepare_dtrust_response = self.load_json_file("data/json/prepare_dtrust_transaction_response_witness_v0.json")
+        create_and_sign_dtrust_response = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_witness_v0_3_of_5_keys.json")
+
+        results = self.blockio.create_and_sign_transactions([prepare_dtrust_response] * 2, keys = self.dtrust_keys[0:3], workers = 2)
+
+        self.assertEqual(results, [create_and_sign_dtrust_response] * 2)
@@ -193,6 +193,20 @@ class TestBitcoinUtilsTransactions(unittest.TestCase):
 
         self.assertEqual(tx.get_txid(), "e4dd8c000f65fcf42598ff332ef81852b44bac9dcdecac72d69a4c56b8c59b73")
 
+    def test_segwit_sighash_midstates(self):
+
+        txins = [TxInput("2464c6122378ee5ed9a42d5192e15713b107924d05d15b58254eb7b2030118c7", i) for i in range(3)]
+        txouts = [TxOutput(self.output_value, get_output_script("tltc1qk2erszs7fp407kh94e6v3yhfq2njczjvg4hnz6")),
+                  TxOutput(self.fee, get_output_script("QeyxkrKbgKvxbBY1HLiBYjMnZx1HDRMYmd"))]
+
+        tx = Transaction(txins, txouts, has_segwit=True)
+        segwit_sighash = SegwitSighash(tx)
+
+        for i in range(len(txins)):
+            for sighash in [bitcoinutils.constants.SIGHASH_ALL, bitcoinutils.constants.SIGHASH_SINGLE]:
+                self.assertEqual(segwit_sighash.digest(i, self.redeem_script, self.output_value + i, sighash),
+                                 tx.get_transaction_segwit_digest(i, self.redeem_script, self.output_value + i, sighash))
+
 class TestBitcoinUtilsAddresses(unittest.TestCase):
     # TODO test for all networks
     
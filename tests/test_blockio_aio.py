@@ -0,0 +1,73 @@
+from block_io import AsyncBlockIo, BlockIoAPIError
+from block_io.aio import AsyncResponse
+
+import asyncio
+import json
+import os
+import unittest
+
+from fakes import AsyncFakeTransport
+
+def json_response(status_code, data):
+    return AsyncResponse(status_code, {}, json.dumps(data).encode('utf-8'))
+
+class TestAsyncBlockIo(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.sweep_wif = "cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML"
+        self.maxDiff = None
+
+    def tearDown(self):
+        self.loop.close()
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_dynamic_methods_are_coroutines(self):
+        balance = {"status": "success", "data": {"network": "BTCTEST"}}
+        transport = AsyncFakeTransport([json_response(200, balance)])
+        blockio = AsyncBlockIo("abc", None, 2, transport = transport)
+
+        response = self.loop.run_until_complete(blockio.get_balance(label = "default"))
+
+        self.assertEqual(response, balance)
+        self.assertEqual(transport.requests[0]["url"], "https://block.io/api/v2/get_balance/?api_key=abc")
+        self.assertEqual(transport.requests[0]["json"], {"api_key": "abc", "label": "default"})
+
+    def test_api_error(self):
+        error = {"status": "fail", "data": {"error_message": "Invalid API Key"}}
+        blockio = AsyncBlockIo("abc", None, 2, transport = AsyncFakeTransport([json_response(200, error)]))
+
+        with self.assertRaises(BlockIoAPIError):
+            self.loop.run_until_complete(blockio.get_balance())
+
+    def test_plain_with_is_refused(self):
+        transport = AsyncFakeTransport([])
+
+        with self.assertRaises(TypeError):
+            with AsyncBlockIo("abc", None, 2, transport = transport):
+                pass
+
+        self.assertFalse(transport.closed)
+
+    def test_sweep_and_sign(self):
+        prepare_sweep_transaction_response = self.load_json_file("data/json/prepare_sweep_transaction_response_p2wpkh.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response_sweep_p2wpkh.json")
+
+        transport = AsyncFakeTransport([json_response(200, prepare_sweep_transaction_response)])
+
+        async def sweep():
+            async with AsyncBlockIo("", None, 2, transport = transport) as blockio:
+                prepared = await blockio.prepare_sweep_transaction(to_address = "abc", private_key = self.sweep_wif)
+                return await blockio.create_and_sign_transaction(prepared)
+
+        response = self.loop.run_until_complete(sweep())
+
+        self.assertNotIn("private_key", transport.requests[0]["json"])
+        self.assertDictEqual(create_and_sign_transaction_response, response)
+        self.assertFalse(transport.closed)
@@ -0,0 +1,49 @@
+from block_io import BlockIo, BlockIoInvalidResponseError
+from block_io.transport import HttpTransport
+from block_io.retry import RetryPolicy
+
+import unittest
+
+from fakes import FakeResponse, FakeTransport
+
+class TestBlockIoTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.balance = {"status": "success", "data": {"network": "BTCTEST", "available_balance": "0.00000000"}}
+
+    def test_custom_transport_is_used(self):
+        transport = FakeTransport([FakeResponse(200, self.balance)])
+        blockio = BlockIo("abc", None, 2, transport = transport)
+
+        self.assertEqual(blockio.get_balance(label = "default"), self.balance)
+        self.assertEqual(transport.requests[0]["url"], "https://block.io/api/v2/get_balance/?api_key=abc")
+        self.assertEqual(transport.requests[0]["json"], {"api_key": "abc", "label": "default"})
+
+    def test_custom_transport_is_not_closed(self):
+        transport = FakeTransport([])
+
+        with BlockIo("abc", None, 2, transport = transport):
+            pass
+
+        self.assertFalse(transport.closed)
+
+    def test_invalid_response_with_custom_transport(self):
+        transport = FakeTransport([FakeResponse(502, {})])
+        blockio = BlockIo("abc", None, 2, transport = transport, retry_policy = RetryPolicy(max_retries = 0)) # a 502 is retried otherwise
+
+        with self.assertRaises(BlockIoInvalidResponseError):
+            blockio.get_balance()
+
+    def test_default_transport_is_pooled(self):
+        blockio = BlockIo("abc", None, 2, pool_size = 4, timeout = 5)
+
+        self.assertIsInstance(blockio.transport, HttpTransport)
+        self.assertEqual(blockio.transport.timeout, 5)
+        self.assertEqual(blockio.transport.session.get_adapter("https://block.io")._pool_maxsize, 4)
+
+        blockio.close()
+
+    def test_keep_alive_disabled(self):
+        transport = HttpTransport(keep_alive = False)
+        self.assertEqual(transport.session.headers['Connection'], 'close')
+        transport.close()
@@ -0,0 +1,103 @@
+from block_io import BlockIo
+from block_io.cache import TTLCache, KeyCache
+
+import json
+import os
+import unittest
+from unittest import mock
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.evicted = []
+        self.cache = TTLCache(2, 10, lambda key, value: self.evicted.append(key), self.clock)
+
+    def test_expiry(self):
+        self.cache.set("a", 1)
+        self.clock.now = 9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.evicted, ["a"])
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.evicted, ["b"])
+        self.assertEqual(len(self.cache), 2)
+
+    def test_clear(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.clear()
+        self.assertEqual(self.evicted, ["a", "b"])
+        self.assertEqual(len(self.cache), 0)
+
+class TestKeyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.pin = "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad"
+        self.wiped = []
+        self.key_cache = KeyCache(on_wipe = self.wiped.append)
+        self.blockio = BlockIo("", self.pin, 2, key_cache = self.key_cache)
+        self.maxDiff = None
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_key_is_derived_once(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_transaction_response.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+
+        with mock.patch.object(BlockIo.Helper, 'dynamicExtractKey', side_effect = BlockIo.Helper.dynamicExtractKey) as extract:
+            for i in range(3):
+                response = self.blockio.create_and_sign_transaction(prepare_transaction_response)
+                self.assertDictEqual(create_and_sign_transaction_response, response)
+
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(len(self.key_cache), 1)
+
+    def test_different_pin_is_not_served_from_cache(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_transaction_response.json")
+
+        self.blockio.create_and_sign_transaction(prepare_transaction_response)
+        self.blockio.pin = "wrong pin"
+
+        self.assertRaises(Exception, self.blockio.create_and_sign_transaction, prepare_transaction_response)
+
+    def test_bytes_pin(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_transaction_response.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+        user_key = prepare_transaction_response['data']['user_key']
+
+        self.blockio.pin = self.pin.encode('utf-8')
+
+        self.assertDictEqual(self.blockio.create_and_sign_transaction(prepare_transaction_response), create_and_sign_transaction_response)
+        self.assertEqual(self.blockio.create_and_sign_transactions([prepare_transaction_response]), [create_and_sign_transaction_response])
+        self.assertEqual(KeyCache.cache_key(user_key, self.pin.encode('utf-8')), KeyCache.cache_key(user_key, self.pin))
+
+    def test_wipe(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_transaction_response.json")
+        user_key = prepare_transaction_response['data']['user_key']
+
+        self.blockio.create_and_sign_transaction(prepare_transaction_response)
+        entry = self.key_cache.get(KeyCache.cache_key(user_key, self.pin))
+        self.key_cache.clear()
+
+        self.assertIsNone(entry.private_key)
+        self.assertEqual(self.wiped, [user_key['public_key']])
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class TestLazyImport(unittest.TestCase):
+
+    def run_python(self, program):
+        output = subprocess.check_output([sys.executable, '-c', program], cwd = ROOT)
+        return json.loads(output.decode('utf-8'))
+
+    @unittest.skipIf(sys.version_info < (3, 7), "no module __getattr__ before Python 3.7, block_io imports everything up front")
+    def test_import_skips_slow_dependencies(self):
+        loaded = self.run_python('''
+import json, sys
+import block_io
+print(json.dumps([name for name in ["bitcoinutils", "sympy", "Crypto", "requests", "ecdsa", "asyncio", "pkg_resources"] if name in sys.modules]))
+''')
+
+        self.assertEqual(loaded, [])
+
+    def test_lazy_names(self):
+        names = self.run_python('''
+import json
+import block_io
+from block_io import BlockIo, AsyncBlockIo, BlockIoPool, PrivateKey, Script, Transaction
+print(json.dumps([block_io.VERSION, AsyncBlockIo.__name__, BlockIoPool.__name__, PrivateKey.__module__, Script.__name__, Transaction.__name__]))
+''')
+
+        self.assertEqual(names[1:], ["AsyncBlockIo", "BlockIoPool", "bitcoinutils.keys", "Script", "Transaction"])
+
+    def test_first_use_loads_dependencies(self):
+        # the first key patches bitcoinutils before using it
+        result = self.run_python('''
+import json, sys
+from block_io import BlockIo
+key = BlockIo.Key.from_wif("cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML")
+print(json.dumps([key.pubkey_hex().decode("utf-8"), "block_io.bitcoinutils_patches" in sys.modules]))
+''')
+
+        self.assertEqual(result[1], True)
+        self.assertEqual(len(result[0]), 66)
+
+    def test_lazy_submodules(self):
+        result = self.run_python('''
+import json, sys
+import block_io
+print(json.dumps([block_io.bitcoinutils_patches.__name__, block_io.aio.__name__, block_io.pool.__name__,
+                  sys.modules["bitcoinutils.constants"].NETWORK_WIF_PREFIXES["DOGE"] == b"\\x9e"]))
+''')
+
+        self.assertEqual(result, ["block_io.bitcoinutils_patches", "block_io.aio", "block_io.pool", True])
+
+    def test_unknown_attribute(self):
+        import block_io
+        self.assertRaises(AttributeError, getattr, block_io, "NoSuchThing")
@@ -0,0 +1,127 @@
+from block_io import BlockIo, AsyncBlockIo, BlockIoAPIError, BlockIoInvalidResponseError
+from block_io.ratelimit import RateLimiter
+from block_io import bulk
+
+import asyncio
+import unittest
+
+from fakes import FakeResponse, FakeTransport, AsyncFakeTransport
+
+class BalanceTransport(FakeTransport):
+    # answers get_address_balance like Block.io: one balance per label, and a failure if any label is unknown
+
+    def __init__(self, unknown = (), dropped = ()):
+        super().__init__()
+        self.unknown = unknown
+        self.dropped = dropped
+
+    def response(self, url, json):
+        labels = (json.get("labels") or json.get("label")).split(",")
+
+        if any(label in self.unknown for label in labels):
+            return FakeResponse(200, {"status": "fail", "data": {"error_message": "unknown label"}})
+
+        balances = [{"label": label, "address": "addr-" + label, "available_balance": str(len(label)), "pending_received_balance": "0.0"}
+                    for label in labels if label not in self.dropped]
+
+        return FakeResponse(200, {"status": "success", "data": {"network": "BTCTEST", "available_balance": "0", "pending_received_balance": "0", "balances": balances}})
+
+class AsyncBalanceTransport(BalanceTransport, AsyncFakeTransport):
+    pass
+
+class TestMapCall(unittest.TestCase):
+
+    def setUp(self):
+        self.labels = ["label%d" % i for i in range(250)]
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_chunks_multi_value_params(self):
+        transport = BalanceTransport()
+        blockio = BlockIo("abc", None, 2, transport = transport)
+
+        results = list(blockio.map_call("get_address_balance", [{"label": label} for label in self.labels], concurrency = 3))
+
+        self.assertEqual(len(transport.requests), 3)
+        self.assertEqual(sorted([item["label"] for (item, response) in results]), sorted(self.labels))
+
+        for (item, response) in results:
+            self.assertEqual(response["data"]["balances"][0]["label"], item["label"])
+            self.assertEqual(response["data"]["available_balance"], str(len(item["label"])))
+            self.assertEqual(response["data"]["network"], "BTCTEST")
+
+    def test_failed_chunk_falls_back_to_single_calls(self):
+        transport = BalanceTransport(unknown = ["label7"])
+        blockio = BlockIo("abc", None, 2, transport = transport)
+
+        results = dict([(item["label"], response) for (item, response) in blockio.map_call("get_address_balance", [{"label": "label%d" % i} for i in range(10)])])
+
+        self.assertEqual(len(transport.requests), 11)
+        self.assertIsInstance(results["label7"], BlockIoAPIError)
+        self.assertEqual(results["label3"]["data"]["balances"][0]["address"], "addr-label3")
+
+    def test_missing_entries(self):
+        transport = BalanceTransport(dropped = ["label9"])
+        blockio = BlockIo("abc", None, 2, transport = transport)
+
+        results = dict([(item["label"], response) for (item, response) in blockio.map_call("get_address_balance", [{"label": "label%d" % i} for i in range(10)])])
+
+        self.assertEqual(len(transport.requests), 1)
+        self.assertIsInstance(results["label9"], BlockIoInvalidResponseError)
+        self.assertEqual(results["label8"]["data"]["balances"][0]["address"], "addr-label8")
+
+    def test_other_arguments_are_not_packed(self):
+        transport = BalanceTransport()
+        blockio = BlockIo("abc", None, 2, transport = transport)
+
+        results = list(blockio.map_call("get_address_balance", [{"labels": "a,b"}, {"label": "c"}, {"label": "d", "extra": 1}]))
+
+        self.assertEqual(len(transport.requests), 3)
+        self.assertEqual(len(results), 3)
+
+    def test_respects_rate_limiter(self):
+        waits = []
+        transport = BalanceTransport()
+        blockio = BlockIo("abc", None, 2, transport = transport, rate_limiter = RateLimiter(1, 1, sleep = waits.append))
+
+        list(blockio.map_call("get_address_balance", [{"label": label} for label in self.labels], chunk_size = 50))
+
+        self.assertEqual(len(transport.requests), 5)
+        self.assertEqual(len(waits), 4)
+
+    def test_async_client(self):
+        transport = AsyncBalanceTransport()
+        blockio = AsyncBlockIo("abc", None, 2, transport = transport)
+
+        async def run():
+            return [result async for result in blockio.map_call("get_address_balance", [{"label": label} for label in self.labels])]
+
+        results = self.loop.run_until_complete(run())
+
+        self.assertEqual(len(transport.requests), 3)
+        self.assertEqual(len(results), 250)
+
+    def test_calls_are_planned_lazily(self):
+        read = []
+
+        def kwargs_list():
+            for label in self.labels:
+                read.append(label)
+                yield {"label": label}
+
+        calls = bulk.plan_calls("get_address_balance", kwargs_list(), 100)
+        first = next(calls)
+
+        self.assertEqual(len(first.items), 100)
+        self.assertEqual(len(read), 100)
+        self.assertEqual([len(call.items) for call in calls], [100, 50])
+
+        transport = BalanceTransport()
+        blockio = BlockIo("abc", None, 2, transport = transport)
+        results = list(blockio.map_call("get_address_balance", kwargs_list(), concurrency = 2))
+
+        self.assertEqual(len(results), 250)
+        self.assertEqual(len(transport.requests), 3)
+
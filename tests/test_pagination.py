@@ -0,0 +1,97 @@
+from block_io import BlockIo, AsyncBlockIo
+
+import asyncio
+import unittest
+
+from fakes import FakeResponse, FakeTransport, AsyncFakeTransport
+
+class PagingTransport(FakeTransport):
+    # 55 transactions, 25 per page, newest first; 7 addresses, 3 per page
+
+    def __init__(self):
+        super().__init__()
+        self.txids = ["tx%d" % i for i in range(55, 0, -1)]
+        self.addresses = ["addr%d" % i for i in range(7)]
+
+    def response(self, url, json):
+        if "get_transactions" in url:
+            start = self.txids.index(json["before_tx"]) + 1 if "before_tx" in json else 0
+            txs = [{"txid": txid, "type": json["type"]} for txid in self.txids[start:start+25]]
+            return FakeResponse(200, {"status": "success", "data": {"network": "BTCTEST", "txs": txs}})
+
+        page = int(json["page"])
+        addresses = [{"address": address} for address in self.addresses[(page-1)*3:page*3]]
+        return FakeResponse(200, {"status": "success", "data": {"network": "BTCTEST", "page": page, "addresses": addresses}})
+
+class AsyncPagingTransport(PagingTransport, AsyncFakeTransport):
+    pass
+
+class TestPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = PagingTransport()
+        self.blockio = BlockIo("abc", None, 2, transport = self.transport)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_iter_transactions(self):
+        for prefetch in [True, False]:
+            txs = list(self.blockio.iter_transactions(type = "received", prefetch = prefetch))
+
+            self.assertEqual([tx["txid"] for tx in txs], self.transport.txids)
+            self.assertTrue(all(tx["type"] == "received" for tx in txs))
+
+        # three full pages and one empty page, each time
+        self.assertEqual(len(self.transport.requests), 8)
+        self.assertEqual(self.transport.requests[1]["json"]["before_tx"], "tx31")
+
+    def test_resume_transactions(self):
+        iterator = self.blockio.iter_transactions(type = "sent")
+
+        for (i, tx) in enumerate(iterator):
+            if i == 30:
+                break
+
+        # tx[30] was handed out but not finished
+        self.assertEqual(iterator.checkpoint, {"before_tx": self.transport.txids[29]})
+
+        rest = list(self.blockio.iter_transactions(type = "sent", checkpoint = iterator.checkpoint))
+        self.assertEqual([tx["txid"] for tx in rest], self.transport.txids[30:])
+
+    def test_iter_addresses(self):
+        iterator = self.blockio.iter_addresses()
+        addresses = [address["address"] for address in iterator]
+
+        self.assertEqual(addresses, self.transport.addresses)
+        self.assertEqual(iterator.checkpoint, {"page": 3, "offset": 1})
+
+    def test_resume_addresses(self):
+        iterator = self.blockio.iter_addresses(prefetch = False)
+
+        for (i, address) in enumerate(iterator):
+            if i == 4:
+                break
+
+        self.assertEqual(iterator.checkpoint, {"page": 2, "offset": 1})
+
+        rest = [address["address"] for address in self.blockio.iter_addresses(checkpoint = iterator.checkpoint)]
+        self.assertEqual(rest, self.transport.addresses[4:])
+
+        # a checkpoint at the end of a page carries on from the next one
+        rest = [address["address"] for address in self.blockio.iter_addresses(checkpoint = {"page": 2, "offset": 3})]
+        self.assertEqual(rest, self.transport.addresses[6:])
+
+    def test_async_client(self):
+        blockio = AsyncBlockIo("abc", None, 2, transport = AsyncPagingTransport())
+
+        async def run():
+            txs = [tx["txid"] async for tx in blockio.iter_transactions(type = "received")]
+            addresses = [address["address"] async for address in blockio.iter_addresses(checkpoint = {"page": 1, "offset": 2})]
+            return (txs, addresses)
+
+        txs, addresses = self.loop.run_until_complete(run())
+
+        self.assertEqual(txs, self.transport.txids)
+        self.assertEqual(addresses, self.transport.addresses[2:])
@@ -0,0 +1,67 @@
+from block_io import BlockIo
+from block_io.signing import sign_digests
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import unittest
+
+class TestParallelSigning(unittest.TestCase):
+
+    def setUp(self):
+
+        self.blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2)
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61",
+            "6c1cefdfd9187b36b36c3698c1362642083dcc1941dc76d751481d3aa29ca65"
+        ]
+        self.maxDiff = None
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_workers_p2sh_3of5_195_inputs(self):
+        # partially signed, so signatures are returned in order
+
+        prepare_transaction_response = self.load_json_file("data/json/prepare_dtrust_transaction_response_P2SH_3of5_195inputs.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_P2SH_3of5_195inputs.json")
+
+        response = self.blockio.create_and_sign_transaction(prepare_transaction_response, keys=self.dtrust_keys[0:3], workers=2)
+
+        self.assertDictEqual(create_and_sign_transaction_response, response)
+
+    def test_executor_witness_v0_4of5_251_inputs(self):
+        # fully signed with a reusable executor
+
+        prepare_transaction_response = self.load_json_file("data/json/prepare_dtrust_transaction_response_WITNESS_V0_4of5_251inputs.json")
+        create_and_sign_transaction_response = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_WITNESS_V0_4of5_251inputs.json")
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            response = self.blockio.create_and_sign_transaction(prepare_transaction_response, keys=self.dtrust_keys, workers=executor)
+
+        self.assertDictEqual(create_and_sign_transaction_response, response)
+
+    def test_chunk_count(self):
+        from block_io.bitcoinutils_patches import PrivateKey
+
+        jobs = [(PrivateKey(secret_exponent=int(self.dtrust_keys[i % 4], 16)), bytes([i]) * 32) for i in range(10)]
+        chunks = []
+
+        class CountingExecutor(ThreadPoolExecutor):
+
+            def map(self, fn, *iterables):
+                items = list(iterables[0])
+                chunks.extend(items)
+                return super().map(fn, items)
+
+        with CountingExecutor(max_workers = 2) as executor:
+            signatures = sign_digests(jobs, executor, chunk_count = 3)
+
+        self.assertEqual(signatures, sign_digests(jobs))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
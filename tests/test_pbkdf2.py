@@ -0,0 +1,26 @@
+from block_io import pbkdf2
+
+import unittest
+from hashlib import sha512
+
+class TestPbkdf2Backends(unittest.TestCase):
+
+    def test_native_matches_python(self):
+        for (password, keylen, salt, itercount) in [("123456", 16, "", 1024),
+                                                    (b"d0478c395b66e588a1518cdd08d8257a", 32, "", 1024),
+                                                    ("deadbeef", 16, "922445847c173e90667a19d90729e1fb", 2500),
+                                                    ("deadbeef", 48, "salt", 1),
+                                                    ("deadbeef", 70, "salt", 3)]:
+            self.assertEqual(pbkdf2.pbkdf2_native(password, keylen, salt, itercount),
+                             pbkdf2.pbkdf2_python(password, keylen, salt, itercount))
+
+    def test_native_matches_python_sha512(self):
+        self.assertEqual(pbkdf2.pbkdf2_native("deadbeef", 64, "salt", 100, sha512),
+                         pbkdf2.pbkdf2_python("deadbeef", 64, "salt", 100, sha512))
+
+    def test_falls_back_for_zero_iterations(self):
+        self.assertEqual(pbkdf2.pbkdf2("deadbeef", 32, "salt", 0), pbkdf2.pbkdf2_python("deadbeef", 32, "salt", 0))
+
+    def test_xorbytes(self):
+        self.assertEqual(pbkdf2.xorbytes(b'\x00\xff\x0f', b'\xff\xff\xf0'), b'\xff\x00\xff')
+        self.assertRaises(ValueError, pbkdf2.xorbytes, b'\x00', b'\x00\x00')
@@ -0,0 +1,69 @@
+from block_io import BlockIo, BlockIoPool, BlockIoAPIError
+from block_io.ratelimit import RateLimiter
+from block_io.retry import RetryPolicy
+
+import unittest
+
+from fakes import FakeResponse, FakeTransport
+
+def respond(url, json):
+    # echoes the API key; the DOGE key's calls fail
+    if json["api_key"] == "doge-key":
+        return FakeResponse(200, {"status": "fail", "data": {"error_message": "nope"}})
+
+    return FakeResponse(200, {"status": "success", "data": {"api_key": json["api_key"]}})
+
+class TestBlockIoPool(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeTransport(respond = respond)
+        self.pool = BlockIoPool({"BTC": "btc-key", "LTC": ("ltc-key", "ltc-pin"), "DOGE": "doge-key"}, transport = self.transport)
+
+    def test_routes_by_network(self):
+        self.assertEqual(self.pool.call("LTC", "get_balance")["data"]["api_key"], "ltc-key")
+        self.assertEqual(self.pool["BTC"].get_balance()["data"]["api_key"], "btc-key")
+        self.assertEqual(self.pool["LTC"].pin, "ltc-pin")
+        self.assertRaises(KeyError, self.pool.client, "BTCTEST")
+
+    def test_shared_transport_separate_state(self):
+        clients = [self.pool[network] for network in self.pool.networks()]
+
+        self.assertTrue(all(client.transport is self.transport for client in clients))
+        self.assertEqual(len(set(id(client.retry_policy) for client in clients)), 3)
+
+        self.pool.close()
+        self.assertFalse(self.transport.closed) # not ours
+
+    def test_close_drops_sweep_keys(self):
+        self.pool["BTC"].save_sweep_key(BlockIo.Key.from_wif("cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML"))
+
+        self.pool.close()
+        self.assertEqual(len(self.pool["BTC"].private_keys), 0)
+
+    def test_fan_out(self):
+        results = self.pool.fan_out("get_balance")
+
+        self.assertEqual(results["BTC"]["data"]["api_key"], "btc-key")
+        self.assertEqual(results["LTC"]["data"]["api_key"], "ltc-key")
+        self.assertIsInstance(results["DOGE"], BlockIoAPIError)
+
+        self.assertEqual(list(self.pool.fan_out("get_balance", networks = ["LTC"]).keys()), ["LTC"])
+
+    def test_options(self):
+        waits = []
+        limiter = RateLimiter(1, 1, sleep = waits.append)
+        policy = RetryPolicy(max_retries = 0)
+
+        pool = BlockIoPool({"BTC": "btc-key", "LTC": "ltc-key"}, transport = self.transport, rate_limiter = limiter)
+        pool.add("DOGE", "doge-key", retry_policy = policy)
+
+        self.assertIs(pool["DOGE"].retry_policy, policy)
+        self.assertIsNot(pool["BTC"].retry_policy, policy)
+
+        # each key has its own bucket
+        pool.call("BTC", "get_balance")
+        pool.call("LTC", "get_balance")
+        self.assertEqual(waits, [])
+
+        pool.call("BTC", "get_balance")
+        self.assertEqual(len(waits), 1)
@@ -0,0 +1,107 @@
+from block_io import BlockIo
+from block_io.prepared import PreparedTransaction, to_satoshis, format_satoshis
+from block_io import decoder
+
+import bitcoinutils.utils
+from decimal import Decimal
+import glob
+import json
+import os
+import unittest
+
+from fakes import FakeResponse
+
+class TestPreparedTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2)
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61"
+        ]
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_to_satoshis(self):
+        for value in ["0", "1", "0.00000001", "0.1", "21000000.00000000", "0.00188899", "12.5"]:
+            self.assertEqual(to_satoshis(value), bitcoinutils.utils.to_satoshis(value))
+
+        for value in ["", ".", "-1", "1e3", "0.000000001", "1.2.3", " 1"]:
+            self.assertRaises(ValueError, to_satoshis, value)
+
+    def test_format_satoshis(self):
+        for value in ["0.00000000", "1.00000000", "0.00000001", "21000000.00000000", "0.00188899", "-0.50000000"]:
+            self.assertEqual(format_satoshis(int(value.replace(".", ""))), value)
+
+        self.assertEqual(format_satoshis(to_satoshis("12.5")), "12.50000000")
+
+    def test_summary_matches_decimal_arithmetic(self):
+        for path in glob.glob(os.path.join(os.path.dirname(__file__), "data/json/prepare_*.json")):
+            data = self.load_json_file(path)
+            summary = self.blockio.summarize_prepared_transaction(data)
+            outputs = data['data']['outputs']
+
+            input_sum = sum([Decimal(cur_input['input_value']) for cur_input in data['data']['inputs']])
+            output_sums = [sum([Decimal(cur_output['output_value']) for cur_output in outputs if category(cur_output['output_category'])], Decimal(0))
+                           for category in [lambda c: c not in ['change', 'blockio-fee'], lambda c: c == 'change', lambda c: c == 'blockio-fee']]
+
+            self.assertEqual(summary['network_fee'], format(input_sum - sum(output_sums), '.8f'))
+            self.assertEqual(summary['total_amount_to_send'], format(output_sums[0], '.8f'))
+            self.assertEqual(summary['blockio_fee'], format(output_sums[2], '.8f'))
+
+    def test_model_matches_fixtures(self):
+        for path in glob.glob(os.path.join(os.path.dirname(__file__), "data/json/prepare_*.json")):
+            data = self.load_json_file(path)['data']
+            prepared = PreparedTransaction.from_response({"data": data})
+
+            self.assertEqual(prepared.network, data['network'])
+            self.assertEqual([cur_input.value for cur_input in prepared.inputs],
+                             [bitcoinutils.utils.to_satoshis(cur_input['input_value']) for cur_input in data['inputs']])
+            self.assertEqual([cur_output.value for cur_output in prepared.outputs],
+                             [bitcoinutils.utils.to_satoshis(cur_output['output_value']) for cur_output in data['outputs']])
+
+            for cur_input in prepared.inputs:
+                self.assertIs(cur_input.address_data, prepared.address_data[cur_input.spending_address])
+
+    def test_sign_from_model(self):
+        prepare_data = self.load_json_file("data/json/prepare_dtrust_transaction_response_witness_v0.json")
+        expected = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_witness_v0_3_of_5_keys.json")
+        prepared = PreparedTransaction.load(prepare_data)
+
+        self.assertIs(PreparedTransaction.load(prepared), prepared)
+        self.assertDictEqual(self.blockio.create_and_sign_transaction(prepared, self.dtrust_keys), expected)
+
+class TestJsonDecoder(unittest.TestCase):
+
+    def tearDown(self):
+        decoder.json_decoder = None
+
+    def test_decoders_agree(self):
+        content = open(os.path.join(os.path.dirname(__file__), "data/json/prepare_dtrust_transaction_response_P2SH_4of5_195inputs.json"), "rb").read()
+        decoded = []
+
+        for name in ["json", "orjson"]:
+            try:
+                decoder.set_json_decoder(name)
+            except ImportError:
+                continue
+
+            decoded.append(self.blockio_process(content))
+
+        self.assertTrue(all(result == decoded[0] for result in decoded))
+
+    def test_custom_decoder(self):
+        calls = []
+        decoder.set_json_decoder(lambda content: calls.append(content) or json.loads(content))
+
+        self.assertEqual(self.blockio_process(b'{"status": "success", "data": {}}'), {"status": "success", "data": {}})
+        self.assertEqual(len(calls), 1)
+
+    def blockio_process(self, content):
+        return BlockIo("", None, 2).process_response("prepare_transaction", FakeResponse(200, content = content))
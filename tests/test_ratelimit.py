@@ -0,0 +1,65 @@
+from block_io import BlockIo
+from block_io.ratelimit import TokenBucket, FileTokenBucket, RateLimiter
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fakes import FakeResponse, FakeTransport
+
+class TestTokenBuckets(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(2, 3, clock = lambda: self.now)
+
+        # the burst is free, then callers queue up at the rate
+        self.assertEqual([bucket.reserve() for i in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+        self.now += 10
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_file_token_bucket_is_shared(self):
+        path = os.path.join(self.directory, "bucket")
+        first = FileTokenBucket(path, 1, 2, clock = lambda: self.now)
+        second = FileTokenBucket(path, 1, 2, clock = lambda: self.now)
+
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+        self.assertEqual(first.reserve(), 1.0)
+        self.assertEqual(second.reserve(), 2.0)
+
+    def test_rate_limiter_per_key_and_method(self):
+        waits = []
+        limiter = RateLimiter(10, 1, method_rates = {"get_balance": (1, 1)}, sleep = waits.append)
+
+        limiter.acquire("key1", "get_balance")
+        limiter.acquire("key2", "get_balance")
+        self.assertEqual(waits, [])
+
+        # key1's get_balance bucket is empty
+        limiter.acquire("key1", "get_balance")
+        self.assertEqual(len(waits), 1)
+        self.assertAlmostEqual(waits[0], 1.0, places = 1)
+
+    def test_shared_rate_limiter_with_blockio(self):
+        waits = []
+        limiter = RateLimiter(1, 1, shared_directory = self.directory, sleep = waits.append)
+        transport = FakeTransport(respond = lambda url, json: FakeResponse(200, {"status": "success", "data": {}}))
+        blockio = BlockIo("abc", None, 2, transport = transport, rate_limiter = limiter)
+
+        blockio.get_balance()
+        blockio.get_balance()
+
+        self.assertEqual(len(waits), 1)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertNotIn("abc", os.listdir(self.directory)[0])
@@ -0,0 +1,111 @@
+from block_io import BlockIo, BlockIoAPIError
+from block_io.cache import ResponseCache
+
+import asyncio
+import unittest
+
+from fakes import FakeResponse, FakeTransport, AsyncFakeTransport
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+class CountingTransport(FakeTransport):
+    # numbers each successful response; withdraw fails
+
+    def response(self, url, json):
+        if "withdraw" in url:
+            return FakeResponse(200, {"status": "fail", "data": {"error_message": "nope"}})
+
+        return FakeResponse(200, {"status": "success", "data": {"request": len(self.requests)}})
+
+class AsyncCountingTransport(CountingTransport, AsyncFakeTransport):
+    pass
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transport = CountingTransport()
+        self.cache = ResponseCache(max_size = 2, method_ttls = {"get_address_by_label": 60, "get_network_fee_estimate": 10}, clock = self.clock)
+        self.blockio = BlockIo("abc", None, 2, transport = self.transport, response_cache = self.cache)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_repeated_reads_are_served_from_cache(self):
+        first = self.blockio.get_address_by_label(label = "default")
+        first["data"]["request"] = "changed by the caller"
+        second = self.blockio.get_address_by_label(label = "default")
+
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(second["data"]["request"], 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # different arguments are a different entry
+        self.blockio.get_address_by_label(label = "other")
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_methods_not_listed_are_not_cached(self):
+        self.blockio.get_balance()
+        self.blockio.get_balance()
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_per_method_ttl(self):
+        self.blockio.get_address_by_label(label = "default")
+        self.blockio.get_network_fee_estimate(amounts = "1", to_addresses = "x")
+        self.clock.now = 10
+        self.blockio.get_address_by_label(label = "default")
+        self.blockio.get_network_fee_estimate(amounts = "1", to_addresses = "x")
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_lru_size_limit(self):
+        for label in ["a", "b", "a", "c", "a"]:
+            self.blockio.get_address_by_label(label = label)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_writes_invalidate(self):
+        self.blockio.get_address_by_label(label = "default")
+        self.blockio.submit_transaction(transaction_data = {})
+        self.blockio.get_address_by_label(label = "default")
+        self.assertEqual(len(self.transport.requests), 3)
+
+        # failed writes invalidate too, they may have gone through
+        self.assertRaises(BlockIoAPIError, self.blockio.withdraw, amounts = "1", to_addresses = "x")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_other_api_keys_are_not_invalidated(self):
+        other = BlockIo("def", None, 2, transport = self.transport, response_cache = self.cache)
+
+        self.blockio.get_address_by_label(label = "default")
+        other.submit_transaction(transaction_data = {})
+        self.blockio.get_address_by_label(label = "default")
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_response_in_flight_during_a_write_is_not_stored(self):
+        key, generation, response = self.cache.lookup("abc", "get_address_by_label", {"label": "default"})
+        self.cache.invalidate("abc")
+        self.cache.store(key, generation, {"status": "success"})
+        self.assertEqual(len(self.cache), 0)
+
+    def test_async_client(self):
+        from block_io import AsyncBlockIo
+
+        transport = AsyncCountingTransport()
+        blockio = AsyncBlockIo("abc", None, 2, transport = transport, response_cache = self.cache)
+
+        async def run():
+            await blockio.get_address_by_label(label = "default")
+            await blockio.get_address_by_label(label = "default")
+            await blockio.submit_transaction(transaction_data = {})
+            await blockio.get_address_by_label(label = "default")
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(transport.requests), 3)
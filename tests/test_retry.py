@@ -0,0 +1,92 @@
+from block_io import BlockIo, BlockIoAPIThrottleError, BlockIoAPIInternalError, BlockIoAPIError
+from block_io.retry import RetryPolicy, parse_retry_after
+
+import unittest
+
+from fakes import FakeResponse, FakeTransport
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.calls = []
+        self.success = {"status": "success", "data": {}}
+        self.throttled = {"status": "error", "data": {}}
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def policy(self, **kwargs):
+        # no jitter: always wait the full backoff
+        return RetryPolicy(clock = lambda: self.now, sleep = self.sleep, jitter = lambda low, high: high,
+                           metrics = lambda method, retries, backoff: self.calls.append((method, retries, backoff)), **kwargs)
+
+    def blockio(self, responses, **kwargs):
+        self.transport = FakeTransport(responses)
+        return BlockIo("abc", None, 2, transport = self.transport, retry_policy = self.policy(**kwargs))
+
+    def test_read_only_call_is_retried_with_backoff(self):
+        blockio = self.blockio([FakeResponse(420, self.throttled), FakeResponse(503, self.throttled), FakeResponse(200, self.success)])
+
+        self.assertEqual(blockio.get_balance(), self.success)
+        self.assertEqual(self.sleeps, [0.5, 1.0])
+        self.assertEqual(self.calls, [("get_balance", 2, 1.5)])
+
+    def test_html_gateway_error_is_retried(self):
+        # a proxy in front of Block.io answers with an HTML page, not JSON
+        blockio = self.blockio([FakeResponse(503, content = b'<html>Service Unavailable</html>'), FakeResponse(200, self.success)])
+
+        self.assertEqual(blockio.get_balance(), self.success)
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(self.sleeps, [0.5])
+
+    def test_failed_throttle_is_retried(self):
+        failed = {"status": "fail", "data": {"error_message": "Rate limit exceeded."}}
+        blockio = self.blockio([FakeResponse(420, failed, {'Retry-After': '2'}), FakeResponse(200, self.success)])
+
+        self.assertEqual(blockio.get_balance(), self.success)
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(self.sleeps, [2.0])
+
+    def test_failed_call_is_not_retried(self):
+        # a 'fail' body with a 200 is Block.io refusing the call, sending it again won't help
+        failed = {"status": "fail", "data": {"error_message": "Invalid label."}}
+        blockio = self.blockio([FakeResponse(200, failed), FakeResponse(200, self.success)])
+
+        self.assertRaises(BlockIoAPIError, blockio.get_balance)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_write_call_is_not_retried(self):
+        blockio = self.blockio([FakeResponse(503, self.throttled), FakeResponse(200, self.success)])
+
+        self.assertRaises(BlockIoAPIInternalError, blockio.submit_transaction, transaction_data = {})
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(self.calls, [("submit_transaction", 0, 0.0)])
+
+    def test_get_new_address_is_not_retried(self):
+        # without a label, every call creates an address
+        blockio = self.blockio([FakeResponse(503, self.throttled), FakeResponse(200, self.success)])
+
+        self.assertRaises(BlockIoAPIInternalError, blockio.get_new_address)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_gives_up_after_max_retries(self):
+        blockio = self.blockio([FakeResponse(420, self.throttled)] * 3, max_retries = 2)
+
+        self.assertRaises(BlockIoAPIThrottleError, blockio.get_balance)
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_retry_after_and_max_elapsed(self):
+        blockio = self.blockio([FakeResponse(420, self.throttled, {'Retry-After': '7'})] * 2 + [FakeResponse(200, self.success)], max_elapsed = 10)
+
+        # the first wait honours Retry-After, the second would go past max_elapsed
+        self.assertRaises(BlockIoAPIThrottleError, blockio.get_balance)
+        self.assertEqual(self.sleeps, [7.0])
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
@@ -0,0 +1,63 @@
+from block_io import BlockIo
+from block_io import script_cache
+from block_io.bitcoinutils_patches import *
+
+import json
+import os
+import unittest
+
+class TestScriptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2)
+        self.public_keys = ("03820317ad251bca573c8fda2b8f26ffc9aae9d5ecb15b50ee08d8f9e009def38e",
+                            "0238de8c9eb2842ecaf0cc61ee6ba23fe4e46f1cfd82eac0910e1d8e865bd76df9")
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61",
+            "6c1cefdfd9187b36b36c3698c1362642083dcc1941dc76d751481d3aa29ca65"
+        ]
+        script_cache.clear_caches()
+        bitcoinutils_setup("LTCTEST")
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_matches_uncached_scripts(self):
+        redeem_script = self.blockio.create_redeem_script(2, list(self.public_keys))
+
+        self.assertEqual(script_cache.redeem_script(2, self.public_keys).to_hex(), redeem_script.to_hex())
+        self.assertEqual(script_cache.output_script("QeyxkrKbgKvxbBY1HLiBYjMnZx1HDRMYmd", "LTCTEST").to_hex(),
+                         get_output_script("QeyxkrKbgKvxbBY1HLiBYjMnZx1HDRMYmd").to_hex())
+        self.assertEqual(script_cache.p2wsh_program(2, self.public_keys),
+                         get_output_script(P2wshAddress.from_script(redeem_script).to_string()).to_hex())
+        self.assertEqual(script_cache.p2pkh_script(self.public_keys[0]).to_hex(),
+                         get_output_script(PublicKey(self.public_keys[0]).get_address().to_string()).to_hex())
+        self.assertEqual(script_cache.p2wpkh_program(self.public_keys[0]),
+                         get_output_script(PublicKey(self.public_keys[0]).get_segwit_address().to_string()).to_hex())
+
+    def test_hit_rates(self):
+        prepare_transaction_response = self.load_json_file("data/json/prepare_dtrust_transaction_response_P2WSH-over-P2SH_4of5_251inputs.json")
+        address_count = len(prepare_transaction_response['data']['input_address_data'])
+        input_count = len(prepare_transaction_response['data']['inputs'])
+
+        # fully signed
+        self.blockio.create_and_sign_transaction(prepare_transaction_response, keys = self.dtrust_keys)
+
+        stats = script_cache.cache_stats()
+
+        # the signing pass looks up each input's redeem script, and its bytes are built once per address
+        # the scriptSig pass looks up each input's redeem script bytes and P2WSH-over-P2SH scriptSig,
+        # and building each address's scriptSig looks up the redeem script bytes once more
+        self.assertEqual(stats['redeem_script']['misses'], address_count)
+        self.assertEqual(stats['redeem_script']['hits'], input_count)
+        self.assertEqual(stats['redeem_script_bytes']['misses'], address_count)
+        self.assertEqual(stats['redeem_script_bytes']['hits'], input_count)
+        self.assertEqual(stats['p2wsh_script_sig']['misses'], address_count)
+        self.assertEqual(stats['p2wsh_script_sig']['hits'], input_count - address_count)
+        self.assertGreater(stats['redeem_script']['hit_rate'], 0.9)
@@ -0,0 +1,145 @@
+from block_io.bitcoinutils_patches import Script, Transaction, TxInput, TxOutput, signature_with_sighash
+from block_io.serialize import write_transaction, stream_transaction, serialize_transaction, write_transaction_hex
+from block_io.serialize import push_data, multisig_script_sig, multisig_witness
+from block_io import script_cache
+
+from bitcoinutils.utils import encode_var_int
+from binascii import hexlify, unhexlify
+import hashlib
+import io
+import unittest
+
+def reference_stream(tx, has_segwit):
+    # bitcoinutils' own Transaction.stream, before block_io replaced it
+    data = tx.version
+
+    if has_segwit and tx.witnesses:
+        data += b'\x00\x01'
+
+    data += encode_var_int(len(tx.inputs))
+
+    for txin in tx.inputs:
+        data += txin.stream()
+
+    data += encode_var_int(len(tx.outputs))
+
+    for txout in tx.outputs:
+        data += txout.stream()
+
+    if has_segwit:
+        for witness in tx.witnesses:
+            data += encode_var_int(len(witness.script))
+            data += witness.to_bytes(True)
+
+    data += tx.locktime
+
+    return data
+
+class TestSerialize(unittest.TestCase):
+
+    def setUp(self):
+        self.public_key = "02ee8d7d4a7a5f0d0fd6dad3ed8c7a6fc5bf2bc2b2c2a5a6d1d1f2bb8bd0ee8ac5"
+        self.signature = "3044022061bd4b6fbe4ad2b2bca4e1df1d7e1b5e9ec6e8e53d8f1ad6c1bfa28bd1e2e7b1022016a4b2e9f1a8fd6a7dbd6e2fa1c7c29b5d8e0f5bb56f8d9b1c38fe7c7a55ed4101"
+        self.output_script = Script(['OP_HASH160', '7f8b7fd6c5e7bc5bbc0d0fd6b1d10a7e3d5a3e1b', 'OP_EQUAL'])
+
+    def transaction(self, inputs, segwit):
+        tx_inputs = [TxInput("%064x" % (i + 1), i) for i in range(inputs)]
+        tx_outputs = [TxOutput(10000 + i, self.output_script) for i in range(3)]
+
+        tx = Transaction(tx_inputs, tx_outputs, has_segwit = segwit)
+
+        for tx_input in tx_inputs:
+            if segwit:
+                tx_input.script_sig = Script(['0020' + 'ab' * 32])
+                tx.witnesses.append(Script(['OP_0', self.signature, self.public_key]))
+            else:
+                tx_input.script_sig = Script([self.signature, self.public_key])
+
+        return tx
+
+    def test_matches_bitcoinutils(self):
+        for (inputs, segwit) in [(1, False), (1, True), (300, False), (300, True)]:
+            tx = self.transaction(inputs, segwit)
+
+            for has_segwit in [False, True]:
+                self.assertEqual(stream_transaction(tx, has_segwit), reference_stream(tx, has_segwit))
+
+            self.assertEqual(serialize_transaction(tx), hexlify(reference_stream(tx, segwit)).decode('utf-8'))
+            self.assertEqual(tx.serialize(), serialize_transaction(tx))
+
+    def test_segwit_without_witnesses(self):
+        # an unsigned segwit transaction has no marker and flag
+        tx = Transaction([TxInput("%064x" % 1, 0)], [TxOutput(10000, self.output_script)], has_segwit = True)
+
+        self.assertEqual(stream_transaction(tx), reference_stream(tx, True))
+        self.assertEqual(stream_transaction(tx)[4:5], b'\x01') # the input count follows the version
+
+    def test_txid(self):
+        # get_txid and the legacy sighash go through the patched Transaction.stream
+        tx = self.transaction(5, True)
+        txid = hashlib.sha256(hashlib.sha256(reference_stream(tx, False)).digest()).digest()[::-1].hex()
+
+        self.assertEqual(tx.get_txid(), txid)
+
+    def test_streaming(self):
+        tx = self.transaction(50, True)
+        pieces = []
+        write_transaction(tx, pieces.append)
+
+        self.assertGreater(len(pieces), 50)
+        self.assertEqual(b''.join(pieces), stream_transaction(tx))
+
+        body = io.StringIO()
+        write_transaction_hex(tx, body.write)
+
+        self.assertEqual(body.getvalue(), serialize_transaction(tx))
+
+        raw = io.BytesIO()
+        write_transaction(tx, raw.write, False)
+
+        self.assertEqual(raw.getvalue(), stream_transaction(tx, False))
+
+    def test_push_data(self):
+        for size in [0, 1, 0x4b, 0x4c, 0xfe, 0xff, 0x100, 0xfffe, 0xffff]:
+            data = b'\xab' * size
+            self.assertEqual(push_data(data), Script([])._op_push_data(data.hex()))
+
+    def test_multisig_scripts(self):
+        # same bytes as the Script objects create_and_sign_transaction used to build for each input
+        public_keys = tuple([self.public_key[:-2] + "%02x" % i for i in range(5)])
+        redeem_script = script_cache.redeem_script(4, public_keys)
+        signatures = [self.signature[:-2] + "%02x" % i for i in range(4)]
+
+        script = Script(["OP_0"] + [signature_with_sighash(signature).decode('utf-8') for signature in signatures] + [redeem_script.to_hex()])
+        raw_signatures = [unhexlify(signature) + b'\x01' for signature in signatures]
+        redeem_script_bytes = script_cache.redeem_script_bytes(4, public_keys)
+
+        self.assertEqual(redeem_script_bytes, redeem_script.to_bytes())
+        self.assertEqual(multisig_script_sig(raw_signatures, redeem_script_bytes).to_bytes(), script.to_bytes())
+        self.assertEqual(multisig_script_sig(raw_signatures, redeem_script_bytes).to_hex(), script.to_hex())
+        self.assertEqual(multisig_witness(raw_signatures, redeem_script_bytes).to_bytes(True), script.to_bytes(True))
+        self.assertEqual(len(multisig_witness(raw_signatures, redeem_script_bytes).script), len(script.script))
+        self.assertEqual(script_cache.p2wsh_script_sig(4, public_keys).to_bytes(), Script([script_cache.p2wsh_program(4, public_keys)]).to_bytes())
+
+    def test_multisig_transaction(self):
+        # witnesses and scriptSigs built from bytes serialize like Script ones
+        public_keys = tuple([self.public_key[:-2] + "%02x" % i for i in range(5)])
+        signatures = [self.signature[:-2] + "%02x" % i for i in range(3)]
+        script = Script(["OP_0"] + [signature_with_sighash(signature).decode('utf-8') for signature in signatures] + [script_cache.redeem_script(3, public_keys).to_hex()])
+        raw = multisig_witness([unhexlify(signature) + b'\x01' for signature in signatures], script_cache.redeem_script_bytes(3, public_keys))
+
+        expected = self.transaction(3, True)
+        tx = self.transaction(3, True)
+        expected.witnesses = [script] * 3
+        tx.witnesses = [raw] * 3
+
+        for tx_input in tx.inputs:
+            tx_input.script_sig = script_cache.p2wsh_script_sig(3, public_keys)
+
+        for tx_input in expected.inputs:
+            tx_input.script_sig = Script([script_cache.p2wsh_program(3, public_keys)])
+
+        self.assertEqual(tx.serialize(), hexlify(reference_stream(expected, True)).decode('utf-8'))
+
+if __name__ == "__main__":
+    unittest.main()
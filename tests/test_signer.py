@@ -0,0 +1,170 @@
+from block_io.signer import Signer, serve_stream, serve_unix_socket, main
+
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+PIN = "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad"
+
+class TestSigner(unittest.TestCase):
+
+    def setUp(self):
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61"
+        ]
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def requests(self):
+        # (request line, expected response)
+        prepare = self.load_json_file("data/json/prepare_transaction_response.json")
+        signed = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+        prepare_dtrust = self.load_json_file("data/json/prepare_dtrust_transaction_response_witness_v0.json")
+        signed_dtrust = self.load_json_file("data/json/create_and_sign_transaction_response_dtrust_witness_v0_3_of_5_keys.json")
+
+        return [(json.dumps({"id": 1, "prepare_data": prepare}), {"id": 1, "result": signed}),
+                (json.dumps({"id": 2, "prepare_data": prepare_dtrust, "keys": self.dtrust_keys}), {"id": 2, "result": signed_dtrust}),
+                (json.dumps({"id": 3, "method": "ping"}), {"id": 3, "result": "pong"}),
+                (json.dumps({"id": 4, "prepare_data": prepare}), {"id": 4, "result": signed})]
+
+    def test_stream(self):
+        requests = self.requests()
+        instream = io.StringIO("\n".join([line for (line, expected) in requests] + ["not json", "", '{"id": 5}']) + "\n")
+        outstream = io.StringIO()
+
+        signer = Signer(PIN, batch_wait = 0.05)
+
+        with mock.patch.object(signer.blockio.Helper, 'dynamicExtractKey', side_effect = signer.blockio.Helper.dynamicExtractKey) as extract:
+            serve_stream(signer, instream, outstream)
+            signer.close()
+
+        responses = dict([(response["id"], response) for response in [json.loads(line) for line in outstream.getvalue().splitlines()]])
+
+        for (line, expected) in requests:
+            self.assertEqual(responses[expected["id"]], expected)
+
+        self.assertEqual(responses[None]["error"]["type"], "InvalidRequest")
+        self.assertEqual(responses[5]["error"]["type"], "InvalidRequest")
+
+        # the user key was decrypted once for both requests
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(len(signer.blockio.key_cache), 0)
+
+    def test_errors(self):
+        prepare = self.load_json_file("data/json/prepare_transaction_response.json")
+        prepare['data']['expected_unsigned_txid'] = 'x'
+        replies = []
+
+        signer = Signer(None)
+        signer.handle(json.dumps({"id": 1, "prepare_data": prepare}), replies.append)
+        signer.handle(json.dumps({"id": 2, "prepare_data": prepare, "keys": ["zz"]}), replies.append)
+        signer.close()
+
+        self.assertEqual(sorted([reply["id"] for reply in replies]), [1, 2])
+        self.assertTrue(all("error" in reply for reply in replies))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+    def test_invalid_keys(self):
+        prepare = self.load_json_file("data/json/prepare_transaction_response.json")
+        signed = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+        replies = []
+
+        signer = Signer(PIN)
+
+        for (request_id, keys) in [(1, [[1]]), (2, "abcd"), (3, [1]), (4, ["not hex"])]:
+            signer.handle(json.dumps({"id": request_id, "prepare_data": prepare, "keys": keys}), replies.append)
+
+        # the signer still works
+        signer.handle(json.dumps({"id": 5, "prepare_data": prepare}), replies.append)
+        signer.close()
+
+        responses = dict([(reply["id"], reply) for reply in replies])
+
+        for request_id in [1, 2, 3, 4]:
+            self.assertEqual(responses[request_id]["error"]["type"], "InvalidRequest")
+
+        self.assertEqual(responses[5], {"id": 5, "result": signed})
+
+    def test_failing_reply(self):
+        # a client that went away doesn't take the signing thread with it
+        prepare = self.load_json_file("data/json/prepare_transaction_response.json")
+        signed = self.load_json_file("data/json/create_and_sign_transaction_response.json")
+        replies = []
+
+        def broken_pipe(response):
+            raise BrokenPipeError()
+
+        signer = Signer(PIN)
+        signer.handle(json.dumps({"id": 1, "prepare_data": prepare}), broken_pipe)
+        signer.handle(json.dumps({"id": 2, "method": "ping"}), broken_pipe)
+        signer.flush()
+
+        signer.handle(json.dumps({"id": 3, "prepare_data": prepare}), replies.append)
+        signer.flush()
+        signer.close()
+
+        self.assertEqual(replies, [{"id": 3, "result": signed}])
+
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "signer.sock")
+        signer = Signer(PIN)
+
+        threading.Thread(target = serve_unix_socket, args = (signer, path), daemon = True).start()
+
+        while not os.path.exists(path):
+            time.sleep(0.01)
+
+        try:
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(path)
+            requests = self.requests()
+            client.sendall(("\n".join([line for (line, expected) in requests]) + "\n").encode('utf-8'))
+            client.shutdown(socket.SHUT_WR)
+
+            received = b""
+
+            while True:
+                data = client.recv(65536)
+
+                if len(data) == 0:
+                    break
+
+                received += data
+
+            client.close()
+
+            responses = dict([(response["id"], response) for response in [json.loads(line) for line in received.decode('utf-8').splitlines()]])
+
+            for (line, expected) in requests:
+                self.assertEqual(responses[expected["id"]], expected)
+        finally:
+            signer.close()
+            shutil.rmtree(directory)
+
+    def test_main_reads_pin_from_environment(self):
+        line, expected = self.requests()[0]
+
+        with mock.patch.dict(os.environ, {"BLOCK_IO_PIN": PIN}), \
+             mock.patch.object(sys, "stdin", io.StringIO(line + "\n")), \
+             mock.patch.object(sys, "stdout", io.StringIO()) as stdout:
+            main(["--key-ttl", "60"])
+
+        self.assertEqual(json.loads(stdout.getvalue()), expected)
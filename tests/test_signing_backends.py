@@ -0,0 +1,49 @@
+from block_io import BlockIo
+from block_io import signing
+
+import unittest
+from binascii import hexlify, unhexlify
+from hashlib import sha256
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+class TestSigningBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.key = BlockIo.Key(unhexlify("6b0e34587dece0ef042c4c7205ce6b3d4a64d0bc484735b9325f7971a0ead963"))
+        self.digest = unhexlify("feedfacedeadbeeffeedfacedeadbeeffeedfacedeadbeeffeedfacedeadbeef")
+        self.low_r_signature = b'3044022042b9b4d673c85798f226c85f55ea6e114a0805bd5a0efba35f14c05235bb67b2022016333edae230c0ab607e948b48ceaefb5cab07300fb869d9da0a1b0f6bb53f65'
+        self.previous_backend = signing.get_signing_backend()
+
+    def tearDown(self):
+        signing.set_signing_backend(self.previous_backend)
+
+    def test_ecdsa_backend(self):
+        self.assertEqual(signing.EcdsaBackend().sign(self.key.private_key, self.digest), self.low_r_signature)
+
+    @unittest.skipIf(coincurve is None, "coincurve is not installed")
+    def test_secp256k1_backend_matches_ecdsa(self):
+        ecdsa_backend = signing.EcdsaBackend()
+        secp256k1_backend = signing.Secp256k1Backend()
+
+        self.assertEqual(secp256k1_backend.sign(self.key.private_key, self.digest), self.low_r_signature)
+
+        # enough digests to exercise the low R grinding
+        for i in range(64):
+            digest = sha256(str(i).encode('utf-8')).digest()
+            self.assertEqual(secp256k1_backend.sign(self.key.private_key, digest), ecdsa_backend.sign(self.key.private_key, digest))
+
+    def test_custom_backend(self):
+
+        class FixedBackend(object):
+            def sign(self, private_key, digest):
+                return b'3006020101020101'
+
+        signing.set_signing_backend(FixedBackend())
+        self.assertEqual(self.key.sign(self.digest), unhexlify(b'3006020101020101'))
+
+        signing.set_signing_backend('ecdsa')
+        self.assertEqual(hexlify(self.key.sign(self.digest)), self.low_r_signature)
@@ -0,0 +1,212 @@
+from block_io import BlockIo, AsyncBlockIo, BlockIoAPIError
+from block_io.singleflight import SingleFlight
+
+import asyncio
+import threading
+import time
+import unittest
+
+from fakes import FakeResponse, FakeTransport, AsyncFakeTransport
+
+def blocking_transport(data):
+    # holds every request until released, so callers pile up behind it
+    return FakeTransport(respond = lambda url, json: FakeResponse(200, data), blocking = True)
+
+def async_transport(data):
+    return AsyncFakeTransport(respond = lambda url, json: FakeResponse(200, data), delay = 0.05)
+
+class Interrupted(BaseException):
+    # stands in for KeyboardInterrupt, which would stop the test run
+    pass
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_threads(self, blockio, transport, calls):
+        results = [None] * len(calls)
+
+        def run(i, call):
+            try:
+                results[i] = call()
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target = run, args = (i, call)) for (i, call) in enumerate(calls)]
+
+        for thread in threads:
+            thread.start()
+
+        # wait until the first request is in flight, and give the rest time to queue up behind it
+        while len(transport.requests) == 0:
+            time.sleep(0.01)
+
+        time.sleep(0.2)
+
+        transport.release.set()
+
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def test_identical_calls_share_one_request(self):
+        transport = blocking_transport({"status": "success", "data": {"available_balance": "1.0"}})
+        blockio = BlockIo("abc", None, 2, transport = transport, single_flight = SingleFlight())
+
+        results = self.run_threads(blockio, transport, [lambda: blockio.get_balance(label = "x")] * 8)
+
+        self.assertEqual(len(transport.requests), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len(set(id(result) for result in results)), 8) # each caller gets its own copy
+        self.assertEqual(blockio.single_flight.calls, {})
+
+    def test_errors_are_shared(self):
+        transport = blocking_transport({"status": "fail", "data": {"error_message": "nope"}})
+        blockio = BlockIo("abc", None, 2, transport = transport, single_flight = SingleFlight())
+
+        results = self.run_threads(blockio, transport, [lambda: blockio.get_balance()] * 4)
+
+        self.assertEqual(len(transport.requests), 1)
+        self.assertTrue(all(isinstance(result, BlockIoAPIError) for result in results))
+
+    def test_followers_get_their_own_error(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        error = BlockIoAPIError("nope")
+        results = dict()
+
+        def send():
+            release.wait(5)
+            raise error
+
+        def run(name):
+            try:
+                single_flight.call("abc", "get_balance", {}, send)
+            except BlockIoAPIError as e:
+                results[name] = e
+
+        threads = [threading.Thread(target = run, args = (name,)) for name in ["leader", "a", "b"]]
+        threads[0].start()
+
+        while len(single_flight.calls) == 0:
+            time.sleep(0.01)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        time.sleep(0.1)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(results["leader"], error)
+
+        for name in ["a", "b"]:
+            self.assertIsInstance(results[name], BlockIoAPIError)
+            self.assertEqual(str(results[name]), "nope")
+            self.assertIsNot(results[name], error) # not sharing one __traceback__
+
+        self.assertEqual(single_flight.calls, {})
+
+    def test_leader_interrupted(self):
+        # a BaseException stays in the leader's thread, followers send the request themselves
+        single_flight = SingleFlight()
+        release = threading.Event()
+        sent = []
+        results = dict()
+
+        def send():
+            sent.append(1)
+
+            if len(sent) == 1:
+                release.wait(5)
+                raise Interrupted()
+
+            time.sleep(0.1) # long enough for the other follower to wait on this one
+            return {"status": "success", "data": {"sent": len(sent)}}
+
+        def run(name):
+            try:
+                results[name] = single_flight.call("abc", "get_balance", {}, send)
+            except Interrupted as e:
+                results[name] = e
+
+        threads = [threading.Thread(target = run, args = (name,)) for name in ["leader", "a", "b"]]
+        threads[0].start()
+
+        while len(single_flight.calls) == 0:
+            time.sleep(0.01)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        time.sleep(0.1)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(results["leader"], Interrupted)
+        self.assertEqual(results["a"], {"status": "success", "data": {"sent": 2}})
+        self.assertEqual(results["b"], {"status": "success", "data": {"sent": 2}})
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(single_flight.calls, {})
+
+    def test_different_calls_are_not_shared(self):
+        transport = blocking_transport({"status": "success", "data": {}})
+        transport.release.set()
+        blockio = BlockIo("abc", None, 2, transport = transport, single_flight = SingleFlight())
+
+        blockio.get_address_balance(label = "a")
+        blockio.get_address_balance(label = "b")
+        blockio.withdraw(amounts = "1", to_addresses = "x")
+
+        self.assertEqual(len(transport.requests), 3)
+
+    def test_async_client(self):
+        transport = async_transport({"status": "success", "data": {"available_balance": "1.0"}})
+        blockio = AsyncBlockIo("abc", None, 2, transport = transport, single_flight = SingleFlight())
+
+        async def run():
+            return await asyncio.gather(*[blockio.get_balance() for i in range(8)],
+                                        blockio.get_address_balance(label = "a"))
+
+        results = self.loop.run_until_complete(run())
+
+        self.assertEqual(len(transport.requests), 2)
+        self.assertTrue(all(result == results[0] for result in results[:8]))
+        self.assertEqual(blockio.single_flight.futures, {})
+
+    def test_async_leader_cancelled(self):
+        # followers of a cancelled caller send the request themselves, they aren't cancelled with it
+        single_flight = SingleFlight()
+        sent = []
+
+        async def send():
+            sent.append(1)
+            await asyncio.sleep(0.05)
+            return {"status": "success", "data": {"sent": len(sent)}}
+
+        async def run():
+            leader = asyncio.ensure_future(single_flight.acall("abc", "get_balance", {}, send))
+            await asyncio.sleep(0.01)
+
+            followers = [asyncio.ensure_future(single_flight.acall("abc", "get_balance", {}, send)) for i in range(3)]
+            await asyncio.sleep(0.01)
+
+            leader.cancel()
+
+            return (await asyncio.gather(leader, return_exceptions = True), await asyncio.gather(*followers))
+
+        ([leader], followers) = self.loop.run_until_complete(run())
+
+        self.assertIsInstance(leader, asyncio.CancelledError)
+        self.assertEqual(followers, [{"status": "success", "data": {"sent": 2}}] * 3)
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(single_flight.futures, {})
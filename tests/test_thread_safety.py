@@ -0,0 +1,88 @@
+from block_io import BlockIo
+from block_io.cache import KeyCache
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import unittest
+
+class TestThreadSafety(unittest.TestCase):
+
+    def setUp(self):
+
+        self.blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2, key_cache = KeyCache())
+        self.dtrust_keys = [
+            "b515fd806a662e061b488e78e5d0c2ff46df80083a79818e166300666385c0a2",
+            "1584b821c62ecdc554e185222591720d6fe651ed1b820d83f92cdc45c5e21f",
+            "2f9090b8aa4ddb32c3b0b8371db1b50e19084c720c30db1d6bb9fcd3a0f78e61",
+            "6c1cefdfd9187b36b36c3698c1362642083dcc1941dc76d751481d3aa29ca65"
+        ]
+        self.maxDiff = None
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_concurrent_signing_across_networks(self):
+        # BTCTEST and LTCTEST transactions, with and without extra keys, signed by one client from many threads
+
+        cases = [("prepare_transaction_response_witness_v1_output.json", "create_and_sign_transaction_response_witness_v1_output.json", []),
+                 ("prepare_transaction_response.json", "create_and_sign_transaction_response.json", []),
+                 ("prepare_dtrust_transaction_response_p2sh.json", "create_and_sign_transaction_response_dtrust_p2sh_3_of_5_keys.json", self.dtrust_keys[0:3]),
+                 ("prepare_dtrust_transaction_response_p2wsh_over_p2sh.json", "create_and_sign_transaction_response_dtrust_p2wsh_over_p2sh_4_of_5_keys.json", self.dtrust_keys)]
+
+        cases = [(self.load_json_file("data/json/" + prepared), self.load_json_file("data/json/" + expected), keys) for (prepared, expected, keys) in cases]
+
+        def sign(case):
+            prepared, expected, keys = case
+            return (self.blockio.create_and_sign_transaction(prepared, keys = keys), expected)
+
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+            for (response, expected) in executor.map(sign, cases * 25):
+                self.assertDictEqual(expected, response)
+
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
+    def test_sweep_keys_are_scoped_to_their_transaction(self):
+        # a saved sweep key survives signing an unrelated transaction
+
+        sweep_key = BlockIo.Key.from_wif("cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML")
+        self.blockio.save_sweep_key(sweep_key)
+
+        self.blockio.create_and_sign_transaction(self.load_json_file("data/json/prepare_transaction_response.json"))
+        self.assertEqual(len(self.blockio.private_keys), 1)
+        self.assertIsNotNone(self.blockio.private_keys.get(sweep_key.pubkey_hex().decode('utf-8')))
+
+        response = self.blockio.create_and_sign_transaction(self.load_json_file("data/json/prepare_sweep_transaction_response_p2pkh.json"))
+        self.assertDictEqual(self.load_json_file("data/json/create_and_sign_transaction_response_sweep_p2pkh.json"), response)
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
+    def test_unused_sweep_keys_expire(self):
+        now = [0]
+        self.blockio.private_keys.clock = lambda: now[0]
+
+        sweep_key = BlockIo.Key.from_wif("cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML")
+        public_key = sweep_key.pubkey_hex().decode('utf-8')
+        self.blockio.save_sweep_key(sweep_key)
+
+        now[0] = BlockIo.sweep_key_ttl - 1
+        self.assertIsNotNone(self.blockio.private_keys.get(public_key))
+
+        now[0] = BlockIo.sweep_key_ttl
+        self.assertIsNone(self.blockio.private_keys.get(public_key))
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
+    def test_forget_sweep_keys(self):
+        sweep_key = BlockIo.Key.from_wif("cTj8Ydq9LhZgttMpxb7YjYSqsZ2ZfmyzVprQgjEzAzQ28frQi4ML")
+
+        self.blockio.save_sweep_key(sweep_key)
+        self.blockio.forget_sweep_keys()
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
+        self.blockio.save_sweep_key(sweep_key)
+        self.blockio.close()
+        self.assertEqual(len(self.blockio.private_keys), 0)
+
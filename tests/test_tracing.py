@@ -0,0 +1,82 @@
+from block_io import BlockIo
+from block_io import tracing
+from block_io.tracing import StatsCollector
+
+import json
+import os
+import unittest
+
+from fakes import FakeResponse, FakeTransport
+
+BALANCE = b'{"status": "success", "data": {"available_balance": "1.0"}}'
+
+def balance_transport():
+    return FakeTransport(respond = lambda url, json: FakeResponse(200, content = BALANCE))
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = StatsCollector()
+        tracing.set_observer(self.stats)
+
+    def tearDown(self):
+        tracing.set_observer(None)
+
+    def load_json_file(self, path):
+        json_file = open(os.path.join(os.path.dirname(__file__), path))
+        data = json.load(json_file)
+        json_file.close()
+
+        return data
+
+    def test_api_call(self):
+        blockio = BlockIo("abc", None, 2, transport = balance_transport())
+        blockio.get_balance()
+        blockio.get_balance()
+
+        dump = self.stats.dump()
+
+        self.assertEqual(dump["spans"]["api_call{method=get_balance}"]["count"], 2)
+        self.assertEqual(dump["spans"]["http_request{method=get_balance,status_code=200}"]["count"], 2)
+        self.assertEqual(dump["spans"]["json_decode{method=get_balance}"]["count"], 2)
+        self.assertEqual(dump["counters"]["http_response_bytes{method=get_balance}"], 2 * len(BALANCE))
+
+    def test_signing(self):
+        blockio = BlockIo("", "d1650160bd8d2bb32bebd139d0063eb6063ffa2f9e4501ad", 2)
+        prepare_data = self.load_json_file("data/json/prepare_transaction_response_P2WSH-over-P2SH_1of2_251inputs.json")
+
+        blockio.create_and_sign_transaction(prepare_data)
+
+        dump = self.stats.dump()
+        spans = dump["spans"]
+
+        # this user key uses the legacy algorithm
+        self.assertEqual(spans["key_stretch{iterations=2048}"]["count"], 1)
+        self.assertEqual(spans["key_decrypt{cipher=AES-256-ECB}"]["count"], 1)
+        self.assertEqual(spans["sighash{inputs=251}"]["count"], 1)
+        self.assertEqual(spans["sign{signatures=251}"]["count"], 1)
+        self.assertEqual(spans["serialize"]["count"], 1)
+        self.assertEqual(dump["counters"]["signatures"], 251)
+
+        # about half of all nonces give a high R, so some of 251 signatures needed another try
+        self.assertGreater(dump["counters"]["low_r_retries"], 0)
+
+        # a failed span is reported, with the error
+        self.assertRaises(ValueError, self.raise_in_span)
+        self.assertEqual(self.stats.dump()["spans"]["failing{error=ValueError}"]["count"], 1)
+
+        self.stats.reset()
+        self.assertEqual(self.stats.dump(), {"spans": {}, "counters": {}})
+
+    def raise_in_span(self):
+        with tracing.span('failing'):
+            raise ValueError()
+
+    def test_disabled(self):
+        tracing.set_observer(None)
+
+        blockio = BlockIo("abc", None, 2, transport = balance_transport())
+        blockio.get_balance()
+
+        self.assertIs(tracing.span('api_call'), tracing.NULL_SPAN)
+        self.assertEqual(self.stats.dump(), {"spans": {}, "counters": {}})